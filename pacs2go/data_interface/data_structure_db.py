@@ -525,6 +525,38 @@ class PACS_DB():
             logger.exception(msg)
             raise Exception(msg)
 
+    def get_files_by_names(self, file_names: list, directory_name: str) -> List['FileData']:
+        """
+        Retrieve multiple files by their names and parent directory in a single query.
+
+        Args:
+            file_names (list): List of file names.
+            directory_name (str): Parent directory name.
+
+        Returns:
+            List[FileData]: List of the files found, ordered by file name.
+
+        Raises:
+            Exception: If an error occurs while retrieving the data.
+        """
+        if not file_names:
+            return []
+        try:
+            placeholders = ', '.join(['%s'] * len(file_names))
+            query = f"""
+                SELECT file_name, parent_directory, format, size, tags, modality, timestamp_creation, timestamp_last_updated
+                FROM {self.FILE_TABLE}
+                WHERE parent_directory = %s AND file_name IN ({placeholders})
+                ORDER BY file_name
+            """
+            self.cursor.execute(query, (directory_name,) + tuple(file_names))
+            results = self.cursor.fetchall()
+            return [FileData(*row) for row in results]
+        except Exception as err:
+            msg = "Error retrieving files by name"
+            logger.exception(msg)
+            raise Exception(msg)
+
     def get_directory_files_slice(self, directory_name:str, filter:str = '', quantity:int = None, offset:int = 0) -> List['FileData']:
         """
         Retrieve a slice of files from a directory with optional filter, quantity, and offset.
@@ -544,12 +576,22 @@ class PACS_DB():
         # quantity defines the number of retrievd files, offset defines how many rows are skipped before the retrieved files
         query = f"""
             SELECT file_name, parent_directory, format, size, tags, modality, timestamp_creation, timestamp_last_updated FROM {self.FILE_TABLE}
-            WHERE parent_directory = %s AND (tags ILIKE %s OR file_name ILIKE %s)
+            WHERE parent_directory = %s
+        """
+        params = [directory_name]
+
+        # Only match tags and names if there is something to match, an empty pattern would still be evaluated for every row
+        if filter:
+            query += " AND (tags ILIKE %s OR file_name ILIKE %s)"
+            params.extend([f'%{filter}%', f'%{filter}%'])
+
+        query += """
             ORDER BY file_name 
             OFFSET %s ROWS
             FETCH FIRST %s ROW ONLY;
-        """    
-        self.cursor.execute(query, (directory_name,f'%{filter}%', f'%{filter}%', offset, quantity))
+        """
+        params.extend([offset, quantity])
+        self.cursor.execute(query, tuple(params))
         results = self.cursor.fetchall()
         
         file_list = []
@@ -862,12 +904,13 @@ class PACS_DB():
             logger.exception(msg)
             raise Exception(msg)
         
-    def get_numberofsubdirectories_under_directory(self, unique_name: str) -> int:
+    def get_numberofsubdirectories_under_directory(self, unique_name: str, filter: str = None) -> int:
         """
         Retrieve the number of subdirectories under a specific directory.
 
         Args:
             unique_name (str): Directory unique name.
+            filter (str, optional): Filter string for subdirectory names.
 
         Returns:
             int: Number of subdirectories.
@@ -881,7 +924,14 @@ class PACS_DB():
                 FROM {self.DIRECTORY_TABLE}
                 WHERE parent_directory = %s
             """
-            self.cursor.execute(query, (unique_name, ))  # Attach % for string matching 
+            params = [unique_name]
+
+            # Same predicate as in get_subdirectories_by_directory
+            if filter:
+                query += " AND dir_name LIKE %s"
+                params.append(f"%{filter}%")
+
+            self.cursor.execute(query, tuple(params))  # Attach % for string matching 
             result = self.cursor.fetchone()
 
             if result:
@@ -924,12 +974,13 @@ class PACS_DB():
             logger.exception(msg)
             raise Exception(msg)
     
-    def get_numberoffiles_within_directory(self, unique_name: str) -> int:
+    def get_numberoffiles_within_directory(self, unique_name: str, filter: str = '') -> int:
         """
         Retrieve the number of files within a specific directory.
 
         Args:
             unique_name (str): Directory unique name.
+            filter (str, optional): Filter string for file names or tags.
 
         Returns:
             int: Number of files.
@@ -943,7 +994,14 @@ class PACS_DB():
                 FROM {self.FILE_TABLE}
                 WHERE parent_directory = %s
             """
-            self.cursor.execute(query, (unique_name, )) 
+            params = [unique_name]
+
+            # Same predicate as in get_directory_files_slice
+            if filter:
+                query += " AND (tags ILIKE %s OR file_name ILIKE %s)"
+                params.extend([f'%{filter}%', f'%{filter}%'])
+
+            self.cursor.execute(query, tuple(params)) 
             result = self.cursor.fetchone()
     
             if result:
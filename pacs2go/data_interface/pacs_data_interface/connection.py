@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pytz import timezone
 
@@ -243,6 +243,68 @@ class Connection:
             logger.exception(msg)
             raise UnsuccessfulGetException(f"Projects")
 
+    def get_project_names(self, only_accessible: bool = False) -> List[str]:
+        """
+        Retrieves the names of all projects from the database, without instantiating the projects.
+
+        Args:
+            only_accessible (bool, optional): If set to True, only names of projects which the user has rights to are retrieved. Defaults to False.
+
+        Returns:
+            List[str]: List of project names, most recently updated first.
+
+        Raises:
+            UnsuccessfulGetException: If unable to retrieve the project names.
+        """
+        if only_accessible:
+            return [name for name, role in self.get_project_roles().items() if role != '']
+        try:
+            with PACS_DB() as db:
+                return [project.name for project in db.get_all_projects()]
+        except Exception:
+            msg = "Failed to get all Project names"
+            logger.exception(msg)
+            raise UnsuccessfulGetException(f"Projects")
+
+    def get_project_roles(self) -> Dict[str, str]:
+        """
+        Retrieves the user's role in every project, without instantiating the projects.
+
+        Returns:
+            Dict[str, str]: Mapping of project name to user role (Owners, Members, Collaborators or an empty string),
+                most recently updated project first.
+
+        Raises:
+            UnsuccessfulGetException: If unable to retrieve the roles.
+        """
+        try:
+            with PACS_DB() as db:
+                names = [project.name for project in db.get_all_projects()]
+            # A single role request per project, the projects themselves are not retrieved from the file store
+            return {name: self._file_store_connection.get_user_role(name) for name in names}
+        except Exception:
+            msg = "Failed to get the user roles of all Projects"
+            logger.exception(msg)
+            raise UnsuccessfulGetException(f"Projects")
+
+    def get_projects(self, quantity: int, offset: int = 0, only_accessible: bool = False) -> List['Project']: # type: ignore
+        """
+        Retrieves a slice of the project list, only the projects within the slice are instantiated.
+
+        Args:
+            quantity (int): Number of projects to retrieve.
+            offset (int, optional): Number of projects to skip. Defaults to 0.
+            only_accessible (bool, optional): If set to True, only projects which the user has rights to are retrieved. Defaults to False.
+
+        Returns:
+            List[Project]: List of Project objects.
+
+        Raises:
+            UnsuccessfulGetException: If unable to retrieve projects.
+        """
+        names = self.get_project_names(only_accessible)
+        return [self.get_project(name) for name in names[offset:offset + quantity]]
+
     def get_directory(self, project_name: str, directory_name: str) -> Optional['Directory']: # type: ignore
         """
         Retrieves a directory by name from a specified project.
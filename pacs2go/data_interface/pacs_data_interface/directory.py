@@ -1,9 +1,13 @@
-import json
 import os
 import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import List
+from threading import Lock
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
 
+import orjson
+from cachetools import TTLCache
 from pytz import timezone
 
 from pacs2go.data_interface.data_structure_db import PACS_DB, DirectoryData
@@ -16,10 +20,59 @@ from pacs2go.data_interface.pacs_data_interface import Project
 from pacs2go.data_interface.xnat import XNATDirectory
 
 
+class _ZipStreamBuffer:
+    """Write-only, non-seekable file object that collects the bytes written by zipfile until they are taken out."""
+
+    def __init__(self) -> None:
+        self._chunks = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class DirectoryPageBundle(NamedTuple):
+    """
+    Named tuple for everything needed to render a directory page.
+
+    Attributes:
+        directory (dict): The directory as dictionary (see Directory.to_dict).
+        user_rights (str): The current user's role within the directory's project.
+        is_favorite (bool): Whether the current user favorited the directory.
+        new_files (List[str]): Names of the files added since the user's last visit.
+        files (List[dict]): The first page of files.
+        subdirectories (List[Directory]): The first page of subdirectories.
+        number_of_subdirectories (int): The number of subdirectories.
+    """
+    directory: dict
+    user_rights: str
+    is_favorite: bool
+    new_files: List[str]
+    files: List[dict]
+    subdirectories: List['Directory']
+    number_of_subdirectories: int
+
+
 class Directory:
     """Represents a directory within the PACS system, providing methods to manage subdirectories and files."""
 
     this_timezone = timezone("Europe/Berlin")
+    # Total counts for paginated (and filtered) subdirectory/file lists, keyed by (unique_name, kind, filter).
+    # Shared between instances, as directories are re-instantiated for every request. The cache is per process:
+    # set_last_updated only drops the counts in the process that made the change, other processes (e.g. gunicorn
+    # workers) report the old counts until the TTL runs out, i.e. for at most 10 seconds.
+    _count_cache = TTLCache(maxsize=1024, ttl=10)
+    _count_cache_lock = Lock()
+    # Maximum number of concurrent file store requests when deleting multiple files
+    BULK_DELETE_MAX_WORKERS = 16
 
     def __init__(self, project: 'Project', name: str, parent_dir:'Directory' = None, parameters:str = "") -> None:
         """
@@ -230,6 +283,8 @@ class Directory:
                 timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
                 db.update_attribute(
                     table_name='Directory', attribute_name='timestamp_last_updated', new_value=timestamp, condition_column='unique_name', condition_value=self.unique_name)
+            # Every change to the directory's content passes through here
+            self._invalidate_counts()
         except:
             msg = f"Failed to set the last updated timestamp for Directory '{self.unique_name}'"
             logger.exception(msg)
@@ -402,13 +457,152 @@ class Directory:
             logger.exception(msg)
             raise UnsuccessfulGetException(msg)
 
-    def get_file(self, file_name: str, _file_filestorage_object=None) -> 'File': # type: ignore
+    def get_subdirectories_page(self, filter: str = '', page: int = 1, size: int = 5) -> Tuple[List['Directory'], int]:
+        """
+        Retrieves one page of (filtered) subdirectories together with the total number of matching subdirectories.
+
+        Args:
+            filter (str, optional): Filter for subdirectory retrieval. Defaults to ''.
+            page (int, optional): The page to retrieve, starting at 1. Defaults to 1.
+            size (int, optional): Number of subdirectories per page. Defaults to 5.
+
+        Returns:
+            Tuple[List[Directory], int]: The subdirectories of the requested page and the total count.
+
+        Raises:
+            UnsuccessfulGetException: If subdirectories cannot be retrieved.
+        """
+        subdirectories = self.get_subdirectories(filter=filter, offset=(page-1)*size, quantity=size)
+        total = self._get_count('subdirectories', filter,
+                                lambda db: db.get_numberofsubdirectories_under_directory(self.unique_name, filter))
+        return subdirectories, total
+
+    def get_page_bundle(self, username: str, files_quantity: int = 20, subdirectories_quantity: int = 5) -> DirectoryPageBundle:
+        """
+        Retrieves all data displayed on the directory page at once and records the user's visit. 
+        All database queries share a single connection instead of opening one per attribute.
+
+        Args:
+            username (str): The current user.
+            files_quantity (int, optional): Number of files on the first page. Defaults to 20.
+            subdirectories_quantity (int, optional): Number of subdirectories on the first page. Defaults to 5.
+
+        Returns:
+            DirectoryPageBundle: The directory page's data.
+
+        Raises:
+            UnsuccessfulGetException: If the data cannot be retrieved.
+        """
+        try:
+            user_rights = self.project.your_user_role
+            with PACS_DB() as db:
+                # New files have to be retrieved before the user's activity is updated
+                new_files = db.get_new_files_for_user(username, self.unique_name)
+                db.update_user_activity(username, self.unique_name)
+                is_favorite = db.is_favorited_by_user(self.unique_name, username)
+                number_of_files = db.get_numberoffiles_under_directory(self.unique_name)
+                number_of_files_on_this_level = db.get_numberoffiles_within_directory(self.unique_name)
+                number_of_subdirectories = db.get_numberofsubdirectories_under_directory(self.unique_name)
+                files_data = db.get_directory_files_slice(directory_name=self.unique_name, quantity=files_quantity, offset=0)
+                subdirectories_data = db.get_subdirectories_by_directory(self.unique_name, None, 0, subdirectories_quantity)
+
+            # The counts are reused by the paginated lists
+            with self._count_cache_lock:
+                self._count_cache[(self.unique_name, 'files', '')] = number_of_files_on_this_level
+                self._count_cache[(self.unique_name, 'subdirectories', '')] = number_of_subdirectories
+
+            directory = {
+                'unique_name': self.unique_name,
+                'display_name': self.display_name,
+                'timestamp_creation': self.timestamp_creation.strftime("%d.%B %Y, %H:%M:%S"),
+                'last_updated': self.last_updated.strftime("%d.%B %Y, %H:%M:%S"),     
+                'is_consistent': self.is_consistent,   
+                'parameters': self.parameters,
+                'number_of_files': number_of_files,  
+                'number_of_files_on_this_level': number_of_files_on_this_level,
+                'associated_directory': self._db_directory.parent_directory or None,
+                'associated_project': self.project.name,
+                'user_rights': user_rights,  
+            }
+            return DirectoryPageBundle(
+                directory=directory,
+                user_rights=user_rights,
+                is_favorite=is_favorite,
+                new_files=new_files,
+                files=self._files_to_dicts(files_data, user_rights),
+                subdirectories=[Directory(self.project, d.unique_name) for d in subdirectories_data],
+                number_of_subdirectories=number_of_subdirectories)
+        except:
+            msg = f"Failed to get the page data for directory '{self.unique_name}'."
+            logger.exception(msg)
+            raise UnsuccessfulGetException(f"Directory '{self.display_name}'")
+
+    def get_files_page(self, filter: str = '', page: int = 1, size: int = 20) -> Tuple[List[dict], int]:
+        """
+        Retrieves one page of (filtered) files as dictionaries together with the total number of matching files.
+
+        Args:
+            filter (str, optional): Filter for file retrieval. Defaults to ''.
+            page (int, optional): The page to retrieve, starting at 1. Defaults to 1.
+            size (int, optional): Number of files per page. Defaults to 20.
+
+        Returns:
+            Tuple[List[dict], int]: The files of the requested page and the total count.
+
+        Raises:
+            UnsuccessfulGetException: If the files cannot be retrieved.
+        """
+        files = self.get_all_files_sliced(filter, size, (page-1)*size)
+        total = self._get_count('files', filter,
+                                lambda db: db.get_numberoffiles_within_directory(self.unique_name, filter))
+        return files, total
+
+    def _get_count(self, kind: str, filter: str, count_query) -> int:
+        """
+        Helper method that returns a cached total count or runs the count query on a cache miss.
+
+        Args:
+            kind (str): What is counted, e.g. 'files' or 'subdirectories'.
+            filter (str): The filter the count applies to.
+            count_query (Callable): Function taking a PACS_DB instance and returning the count.
+
+        Returns:
+            int: The total count.
+
+        Raises:
+            UnsuccessfulGetException: If the count cannot be retrieved.
+        """
+        key = (self.unique_name, kind, filter or '')
+        with self._count_cache_lock:
+            total = self._count_cache.get(key)
+        if total is None:
+            try:
+                with PACS_DB() as db:
+                    total = count_query(db)
+            except Exception:
+                msg = f"Failed to count {kind} for directory '{self.unique_name}'."
+                logger.exception(msg)
+                raise UnsuccessfulGetException(f"Number of {kind}")
+            with self._count_cache_lock:
+                self._count_cache[key] = total
+        return total
+
+    def _invalidate_counts(self) -> None:
+        """
+        Helper method that drops all cached counts of this directory.
+        """
+        with self._count_cache_lock:
+            for key in [key for key in self._count_cache.keys() if key[0] == self.unique_name]:
+                self._count_cache.pop(key, None)
+
+    def get_file(self, file_name: str, _file_filestorage_object=None, _file_db_object=None) -> 'File': # type: ignore
         """
         Retrieves a file from this directory.
 
         Args:
             file_name (str): The name of the file.
             _file_filestorage_object (optional): The file storage object. Defaults to None.
+            _file_db_object (optional): The file's database entry. Defaults to None.
 
         Returns:
             File: The file object.
@@ -419,13 +613,70 @@ class Directory:
         from pacs2go.data_interface.pacs_data_interface import File
         
         try:
-            file = File(self, name=file_name, _file_filestorage_object=_file_filestorage_object)
+            file = File(self, name=file_name, _file_filestorage_object=_file_filestorage_object, _file_db_object=_file_db_object)
             return file
         except:
             msg = f"Failed to get file '{file_name}' in directory '{self.unique_name}'."
             logger.exception(msg)
             return None
 
+    def get_files_bulk(self, file_names: List[str]) -> List['File']: # type: ignore
+        """
+        Retrieves multiple files of this directory at once. The database entries are fetched with a single
+        query and the file store metadata with a single directory listing, instead of one of each per file.
+
+        Args:
+            file_names (List[str]): The names of the files.
+
+        Returns:
+            List[File]: The file objects, ordered by file name.
+
+        Raises:
+            UnsuccessfulGetException: If any of the files cannot be retrieved.
+        """
+        from pacs2go.data_interface.pacs_data_interface import File
+
+        try:
+            with PACS_DB() as db:
+                files_data = db.get_files_by_names(file_names, self.unique_name)
+            fs = {f.name: f for f in self._file_store_directory.get_all_files()}
+
+            files = [File(self, name=f.file_name, _file_filestorage_object=fs[f.file_name], _file_db_object=f)
+                     for f in files_data if f.file_name in fs]
+        except:
+            msg = f"Failed to get files for directory '{self.unique_name}': {file_names}"
+            logger.exception(msg)
+            raise UnsuccessfulGetException("Files")
+
+        if len(files) != len(set(file_names)):
+            missing = set(file_names) - {file.name for file in files}
+            msg = f"Failed to get files in directory '{self.unique_name}': {sorted(missing)}"
+            logger.error(msg)
+            raise UnsuccessfulGetException(f"Files {', '.join(sorted(missing))}")
+        return files
+
+    def get_first_file(self) -> Optional['File']: # type: ignore
+        """
+        Retrieves the first file (ordered by name) on this directory's level without listing all files.
+
+        Returns:
+            Optional[File]: The first file object or None if there are no files on this level.
+
+        Raises:
+            UnsuccessfulGetException: If the file cannot be retrieved.
+        """
+        try:
+            with PACS_DB() as db:
+                first = db.get_directory_files_slice(directory_name=self.unique_name, quantity=1, offset=0)
+        except:
+            msg = f"Failed to get the first file for directory '{self.unique_name}'."
+            logger.exception(msg)
+            raise UnsuccessfulGetException("First file")
+
+        if not first:
+            return None
+        return self.get_file(first[0].file_name)
+
     def get_all_files(self) -> List['File']: # type: ignore
         """
         Retrieves all files within this directory.
@@ -440,8 +691,11 @@ class Directory:
             # Get all files, necessary for file viewer
             # Retrieval via file store logic to make sure that the physical file really exists and is not merely a db entry.
             fs = self._file_store_directory.get_all_files()
+            # Database entries of all listed files with a single query instead of one per file
+            with PACS_DB() as db:
+                files_data = {f.file_name: f for f in db.get_files_by_names([f.name for f in fs], self.unique_name)}
             files = [self.get_file(
-                file_name=f.name, _file_filestorage_object=f) for f in fs]
+                file_name=f.name, _file_filestorage_object=f, _file_db_object=files_data.get(f.name)) for f in fs]
 
             
             if any(file is None for file in files):
@@ -460,6 +714,24 @@ class Directory:
             logger.exception(msg)
             raise UnsuccessfulGetException("Files")
 
+    def get_all_file_names(self) -> List[str]:
+        """
+        Retrieves the names of all files within this directory (without any further file metadata).
+
+        Returns:
+            List[str]: A list of file names.
+
+        Raises:
+            UnsuccessfulGetException: If the file names cannot be retrieved.
+        """
+        try:
+            with PACS_DB() as db:
+                return db.get_all_files(self.unique_name)
+        except:
+            msg = f"Failed to get all file names for directory '{self.unique_name}'."
+            logger.exception(msg)
+            raise UnsuccessfulGetException("File names")
+
     def get_all_files_sliced_and_as_json(self,  filter:str= '', quantity:int = None, offset:int = 0) -> dict:
         """
         Retrieves a sliced list of files as a JSON object. Offset and Quantity allow for pagination optimization.
@@ -472,6 +744,23 @@ class Directory:
         Returns:
             dict: A JSON object containing file information.
 
+        Raises:
+            UnsuccessfulGetException: If the files cannot be retrieved.
+        """
+        return orjson.dumps(self.get_all_files_sliced(filter, quantity, offset)).decode()
+
+    def get_all_files_sliced(self,  filter:str= '', quantity:int = None, offset:int = 0) -> List[dict]:
+        """
+        Retrieves a sliced list of files as dictionaries. Offset and Quantity allow for pagination optimization.
+
+        Args:
+            filter (str, optional): Filter for file retrieval. Defaults to ''.
+            quantity (int, optional): Quantity of files to retrieve. Defaults to None.
+            offset (int, optional): Offset for file retrieval. Defaults to 0.
+
+        Returns:
+            List[dict]: A list of dictionaries containing file information.
+
         Raises:
             UnsuccessfulGetException: If the files cannot be retrieved.
         """
@@ -482,7 +771,25 @@ class Directory:
             with PACS_DB() as db:
                 files_data = db.get_directory_files_slice(directory_name=self.unique_name, filter=filter, quantity=quantity, offset=offset)
 
-            files = [ { 
+            # The role is the same for all files, look it up once instead of per file
+            return self._files_to_dicts(files_data, self.project.your_user_role)
+        except:
+            msg = f"Failed to get all files for directory '{self.unique_name}'."
+            logger.exception(msg)
+            raise UnsuccessfulGetException("Files")
+
+    def _files_to_dicts(self, files_data: list, user_rights: str) -> List[dict]:
+        """
+        Helper method that converts database file entries to dictionaries.
+
+        Args:
+            files_data (list): The FileData entries.
+            user_rights (str): The current user's role within the project.
+
+        Returns:
+            List[dict]: A list of dictionaries containing file information.
+        """
+        return [ { 
             'name': f.file_name,
             'format': f.format,
             'modality': f.modality,
@@ -492,13 +799,8 @@ class Directory:
             'last_updated': f.timestamp_last_updated.strftime("%d.%B %Y, %H:%M:%S"),
             'associated_directory': f.parent_directory,
             'associated_project': self.project.name,
-            'user_rights': self.project.your_user_role
-                    } for f in files_data]
-            return json.dumps(files)
-        except:
-            msg = f"Failed to get all files for directory '{self.unique_name}'."
-            logger.exception(msg)
-            raise UnsuccessfulGetException("Files")
+            'user_rights': user_rights
+                } for f in files_data]
 
     def get_new_files_for_user(self, username:str) -> list:
         """
@@ -538,6 +840,8 @@ class Directory:
         try:
             with PACS_DB() as db:
                 db.update_multiple_files(file_names, modality, tags, self.unique_name)
+            # Tags are part of the file filter
+            self._invalidate_counts()
             logger.info(
                 f"User {self.project.connection.user} updated multiple filese in directory '{self.unique_name}': {file_names}.")
         except:
@@ -545,27 +849,54 @@ class Directory:
             logger.exception(msg)
             raise UnsuccessfulAttributeUpdateException(f"Multiple files in {self.unique_name}")
         
-    def delete_multiple_files(self, file_names:list) -> None:
+    def delete_multiple_files(self, file_names:list, parallel: bool = True) -> None:
         """
-        Deletes multiple files within this directory.
+        Deletes multiple files within this directory from the file store and the database.
+        The file store only supports deleting single files, these requests are issued concurrently if parallel is set.
 
         Args:
             file_names (list): List of file names to delete.
+            parallel (bool, optional): Whether to delete the files from the file store concurrently. Defaults to True.
 
         Raises:
-            UnsuccessfulDeletionException: If the files cannot be deleted.
+            UnsuccessfulDeletionException: If (some of) the files cannot be deleted. Files that could be deleted stay deleted.
         """
+        def delete_from_file_store(file_store_file) -> Optional[str]:
+            # Returns the file's name if it could not be deleted
+            try:
+                file_store_file.delete_file()
+                return None
+            except Exception:
+                logger.exception(f"Failed to delete File '{file_store_file.name}' in directory '{self.unique_name}' from the file store.")
+                return file_store_file.name
+
         try:
-            with PACS_DB() as db:
-                db.delete_multiple_files_by_name(file_names=file_names, directory_name=self.unique_name)
-            self.set_last_updated(datetime.now(self.this_timezone))
-            logger.info(
-                f"User {self.project.connection.user} deleted multiple filese in directory '{self.unique_name}': {file_names}.")
+            # One listing for all files, instead of one lookup per file
+            file_store_files = {f.name: f for f in self._file_store_directory.get_all_files()}
+            to_delete = [file_store_files[name] for name in file_names if name in file_store_files]
+
+            if parallel and len(to_delete) > 1:
+                with ThreadPoolExecutor(max_workers=min(self.BULK_DELETE_MAX_WORKERS, len(to_delete))) as executor:
+                    failed = [name for name in executor.map(delete_from_file_store, to_delete) if name]
+            else:
+                failed = [name for name in map(delete_from_file_store, to_delete) if name]
+
+            # Database entries without a physical file are removed as well
+            deleted = [name for name in file_names if name not in failed]
+            if deleted:
+                with PACS_DB() as db:
+                    db.delete_multiple_files_by_name(file_names=deleted, directory_name=self.unique_name)
+                self.set_last_updated(datetime.now(self.this_timezone))
+                logger.info(
+                    f"User {self.project.connection.user} deleted multiple filese in directory '{self.unique_name}': {deleted}.")
         except:
             msg = f"Failed to delete files for directory '{self.unique_name}': {file_names}"
             logger.exception(msg)
             raise UnsuccessfulDeletionException(f"Multiple files in {self.unique_name}")
 
+        if failed:
+            raise UnsuccessfulDeletionException(f"files {', '.join(failed)} in {self.unique_name}")
+
     def favorite_directory(self, username:str) -> None:
         """
         Marks this directory as a favorite for a user.
@@ -661,6 +992,71 @@ class Directory:
                 logger.exception(msg)
                 raise DownloadException
             
+    def download_as_zip(self, target: BinaryIO) -> None:
+        """
+        Writes the contents of this directory (including subdirectories) as zip archive into a binary file object.
+        File data is copied from the file store straight into the archive, nothing is staged on disk.
+        Entries are stored uncompressed, as medical image data (DICOM, compressed NIFTI, JPEG,...) is mostly compressed already.
+
+        Args:
+            target (BinaryIO): A writable binary file object, e.g. io.BytesIO.
+
+        Raises:
+            DownloadException: If the download fails.
+        """
+        try:
+            with zipfile.ZipFile(target, 'w', zipfile.ZIP_STORED) as zip_file:
+                for arcname, file in self._files_for_zip(self.display_name):
+                    zip_file.writestr(arcname, file.data)
+            logger.info(f"User {self.project.connection.user} downloaded all files for directory '{self.unique_name}'.")
+        except Exception:
+            msg = f"Failed to download directory '{self.unique_name}'."
+            logger.exception(msg)
+            raise DownloadException
+
+    def stream_as_zip(self) -> Iterator[bytes]:
+        """
+        Yields the contents of this directory (including subdirectories) as zip archive, chunk by chunk.
+        Each chunk is sent on as soon as a file was added, so at most one file is held in memory at a time.
+        Entries are stored uncompressed, as medical image data (DICOM, compressed NIFTI, JPEG,...) is mostly compressed already.
+
+        Yields:
+            bytes: The next part of the zip archive.
+
+        Raises:
+            DownloadException: If the download fails.
+        """
+        buffer = _ZipStreamBuffer()
+        try:
+            # The buffer is not seekable, so zipfile writes the sizes of each entry after its data
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+                for arcname, file in self._files_for_zip(self.display_name):
+                    zip_file.writestr(arcname, file.data)
+                    yield buffer.take()
+            # Central directory
+            yield buffer.take()
+            logger.info(f"User {self.project.connection.user} downloaded all files for directory '{self.unique_name}'.")
+        except Exception:
+            msg = f"Failed to download directory '{self.unique_name}'."
+            logger.exception(msg)
+            raise DownloadException
+
+    def _files_for_zip(self, folder: str) -> Iterator[Tuple[str, 'File']]: # type: ignore
+        """
+        Helper method that recursively yields the files of this directory and its subdirectories along with their path inside a zip archive.
+
+        Args:
+            folder (str): The folder inside the archive that represents this directory.
+
+        Yields:
+            Tuple[str, File]: The path inside the archive and the file.
+        """
+        for file in self.get_all_files():
+            yield f"{folder}/{file.name}", file
+
+        for subdirectory in self.get_subdirectories():
+            yield from subdirectory._files_for_zip(f"{folder}/{subdirectory.display_name}")
+
     def to_dict(self) -> dict:
         """
         Converts various attributes of the Directory object to a dictionary for serialization.
@@ -17,7 +17,7 @@ class File:
 
     this_timezone = timezone("Europe/Berlin")
 
-    def __init__(self, directory: 'Directory', name: str, _file_filestorage_object=None) -> None:
+    def __init__(self, directory: 'Directory', name: str, _file_filestorage_object=None, _file_db_object=None) -> None:
         """
         Initializes a File object.
 
@@ -25,6 +25,7 @@ class File:
             directory (Directory): The directory to which this file belongs.
             name (str): The name of the file.
             _file_filestorage_object (optional): The file storage object. Defaults to None.
+            _file_db_object (optional): The file's database entry. Defaults to None.
 
         Raises:
             UnsuccessfulGetException: If the file cannot be retrieved from the database or file storage.
@@ -34,11 +35,15 @@ class File:
         self.name = name
 
         try:
-            with PACS_DB() as db:
-                self._db_file = db.get_file_by_name_and_directory(
-                    self.name, self.directory.unique_name)
-                if self._db_file is None:
-                    raise FileNotFoundError
+            if _file_db_object:
+                # Database entry was already retrieved (e.g. in bulk by the directory)
+                self._db_file = _file_db_object
+            else:
+                with PACS_DB() as db:
+                    self._db_file = db.get_file_by_name_and_directory(
+                        self.name, self.directory.unique_name)
+            if self._db_file is None:
+                raise FileNotFoundError
         except:
             msg = f"Failed to get DB-File '{self.name}' in directory '{self.directory.unique_name}'."
             logger.exception(msg)
@@ -269,6 +274,26 @@ class File:
             logger.exception(msg)
             raise UnsuccessfulGetException("The actual file data itself")
 
+    def read_head(self, max_bytes: int) -> bytes:
+        """
+        Returns up to the first max_bytes of the file data from the file store, without downloading the whole file.
+
+        Args:
+            max_bytes (int): Maximum number of bytes to read.
+
+        Returns:
+            bytes: The beginning of the file data.
+
+        Raises:
+            UnsuccessfulGetException: If the data cannot be retrieved.
+        """
+        try:
+            return self._file_store_file.read_head(max_bytes)
+        except:
+            msg = f"Failed to get file data for File '{self.name}' in directory '{self.directory.unique_name}'."
+            logger.exception(msg)
+            raise UnsuccessfulGetException("The actual file data itself")
+
     def exists(self) -> bool:
         """
         Checks if the file exists in the file store.
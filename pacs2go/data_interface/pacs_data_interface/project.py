@@ -2,6 +2,7 @@ import os
 import shutil
 import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Sequence, Union
@@ -29,6 +30,8 @@ class Project:
                 '.svg':'Scalable Vector Graphics'}
 
     this_timezone = timezone("Europe/Berlin")
+    # Maximum number of concurrent file store uploads when inserting the files of a zip
+    BULK_UPLOAD_MAX_WORKERS = 6
 
     def __init__(self, connection, name: str, _project_file_store_object=None) -> None:
         """
@@ -778,58 +781,66 @@ class Project:
                     depth = 0
                     
                     
-                    # Walk through the unzipped directory
-                    for root, dirs, files in os.walk(temp_dir):  
+                    def upload_to_file_store(file_path: str, file_id: str, directory_name: str) -> None:
                         try:
-                            if root == temp_dir or "__MACOSX" in root:
-                                # Skip tempdir name and skip top level folder for direct unpack, skip mac specific 
-                                continue
+                            self._file_store_project.insert_file_into_project(
+                                file_path=file_path, file_id=file_id, directory_name=directory_name, tags_string=tags_string)
+                        except Exception as e:
+                            logger.exception(f"An error occurred while uploading '{file_id}' to '{directory_name}': {e}")
+
+                    # One database connection for the whole zip instead of one per file (DICOM series hold thousands of files).
+                    # Directories and database entries are created in walking order, only the uploads to the file store run concurrently.
+                    with PACS_DB() as db, ThreadPoolExecutor(max_workers=self.BULK_UPLOAD_MAX_WORKERS) as executor:
+                        # Walk through the unzipped directory
+                        for root, dirs, files in os.walk(temp_dir):
+                            try:
+                                if root == temp_dir or "__MACOSX" in root:
+                                    # Skip tempdir name and skip top level folder for direct unpack, skip mac specific 
+                                    continue
                         
-                            if not (os.path.basename(root) == root_dir.display_name or (unpack_directly and os.path.basename(root)==root_dir_name)):
-                                # Only increase nesting level if root path implies that you should (This way directories of the same level stay on the same level)
-                                if root.count(os.sep) != depth:
-                                    directory = current_dir
-                                    depth = root.count(os.sep)
+                                if not (os.path.basename(root) == root_dir.display_name or (unpack_directly and os.path.basename(root)==root_dir_name)):
+                                    # Only increase nesting level if root path implies that you should (This way directories of the same level stay on the same level)
+                                    if root.count(os.sep) != depth:
+                                        directory = current_dir
+                                        depth = root.count(os.sep)
                               
-                                # Create sub-directory according to zipfile
-                                current_dir = Directory(self, os.path.basename(root), parent_dir=directory)
+                                    # Create sub-directory according to zipfile
+                                    current_dir = Directory(self, os.path.basename(root), parent_dir=directory)
                                 
-                            if len(files) > 0:
-                                # Handle files of current directory
-                                for file_name in files:
-
-                                    if Path(file_name).suffix == '' or file_name.startswith("._"):
-                                        # Skip files that do not have a file extension or are zipping artefacts
-                                        logger.info(
-                                            f"User {self.connection.user} tried to insert a forbidden file ('{file_name}') into Directory '{directory.unique_name}' in Project '{self.name}'.")
-                                        continue
-
-                                    # Create a FileData object
-                                    file_data = FileData(
-                                        file_name=file_name,
-                                        parent_directory=current_dir.unique_name,
-                                        format=self.file_format[Path(file_name).suffix.lower()],
-                                        size=Path(os.path.join(root, file_name)).stat().st_size,
-                                        tags=tags_string,
-                                        modality=modality,
-                                        timestamp_creation=timestamp,
-                                        timestamp_last_updated=timestamp
-                                    )
+                                if len(files) > 0:
+                                    # Handle files of current directory
+                                    for file_name in files:
+
+                                        if Path(file_name).suffix == '' or file_name.startswith("._"):
+                                            # Skip files that do not have a file extension or are zipping artefacts
+                                            logger.info(
+                                                f"User {self.connection.user} tried to insert a forbidden file ('{file_name}') into Directory '{directory.unique_name}' in Project '{self.name}'.")
+                                            continue
+
+                                        # Create a FileData object
+                                        file_data = FileData(
+                                            file_name=file_name,
+                                            parent_directory=current_dir.unique_name,
+                                            format=self.file_format[Path(file_name).suffix.lower()],
+                                            size=Path(os.path.join(root, file_name)).stat().st_size,
+                                            tags=tags_string,
+                                            modality=modality,
+                                            timestamp_creation=timestamp,
+                                            timestamp_last_updated=timestamp
+                                        )
                                 
-                                    # Insert file to current directory
-                                    with PACS_DB() as db:
-                                        # Insert into DB
+                                        # Insert file to current directory
                                         updated_file_data = db.insert_into_file(
                                             file_data)
                                         # logger.info(f"insert {updated_file_data.file_name}, {updated_file_data.parent_directory}") # only for debugging as it is very time consuming
 
-                                    # Upload to file store
-                                    self._file_store_project.insert_file_into_project(
-                                        file_path=os.path.join(root, file_name), file_id=updated_file_data.file_name, directory_name=current_dir.unique_name, tags_string=tags_string)
+                                        # Upload to file store (in the background, the extracted files exist until all uploads are done)
+                                        executor.submit(upload_to_file_store, os.path.join(root, file_name),
+                                                        updated_file_data.file_name, current_dir.unique_name)
                            
-                        except Exception as e:
-                            logger.exception(f"An error occurred while processing files: {e}")
-                            continue
+                            except Exception as e:
+                                logger.exception(f"An error occurred while processing files: {e}")
+                                continue
                         
   
                     self.set_last_updated(datetime.now(self.this_timezone))
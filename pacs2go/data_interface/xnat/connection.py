@@ -1,10 +1,10 @@
 import json
 from typing import List
 
-import requests
 from werkzeug.exceptions import HTTPException
 
 from pacs2go.data_interface.logs.config_logging import logger
+from pacs2go.data_interface.xnat.utils.http_session import pooled_session
 
 
 
@@ -26,13 +26,15 @@ class XNAT():
         """
         self.server = server
         self.username = username
+        # The authenticated user of a session does not change, it is only looked up once (see user)
+        self._user = None
 
         # User may either specify password of session_id to authenticate themselves
         if password:
             data = {"username": username, "password": password}
             headers = {"Content-Type": "application/x-www-form-urlencoded"}
             # Authenticate user via REST API
-            response = requests.post(
+            response = pooled_session.post(
                 server + "/data/services/auth", data=data, headers=headers)
 
             if response.status_code != 200:
@@ -46,7 +48,7 @@ class XNAT():
                 self.session_id = response.text
                 self.cookies = {"JSESSIONID": self.session_id}
                 # Log successful authentication
-                logger.info(f"User authenticated successfully. {requests.get(self.server + '/xapi/users/username',cookies=self.cookies).text}")
+                logger.info(f"User authenticated successfully. {pooled_session.get(self.server + '/xapi/users/username',cookies=self.cookies).text}")
 
         elif session_id:
             self.session_id = session_id
@@ -71,12 +73,16 @@ class XNAT():
         Raises:
             HTTPException: If the username cannot be retrieved.
         """
-        response = requests.get(
+        if self._user is not None:
+            return self._user
+
+        response = pooled_session.get(
             self.server + "/xapi/users/username", cookies=self.cookies)
 
         if response.status_code == 200:
             # User was found, return username
-            return response.text
+            self._user = response.text
+            return self._user
         else:
             # User not found
             msg = "User not found."
@@ -94,7 +100,7 @@ class XNAT():
         Raises:
             HTTPException: If the user list cannot be retrieved.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.server + "/xapi/users", cookies=self.cookies)
 
         if response.status_code == 200:
@@ -114,7 +120,7 @@ class XNAT():
         Raises:
             HTTPException: If the session is invalid.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.server + "/data/JSESSION/", cookies=self.cookies)
         if response.status_code != 200:
             # If 200 isn't returned this means that the jsessionid has been invalidated (timeout)
@@ -133,7 +139,7 @@ class XNAT():
         Raises:
             HTTPException: If the session cannot be invalidated.
         """
-        response = requests.post(
+        response = pooled_session.post(
             self.server + "/data/JSESSION/", cookies=self.cookies)
         if response.status_code != 200:
             msg = "Unable to invalidate session Id."
@@ -168,7 +174,7 @@ class XNAT():
             <keywords>{keywords if keywords else 'Set keywords here.'}</keywords>
             </projectData>
             """
-        response = requests.post(self.server + "/data/projects",
+        response = pooled_session.post(self.server + "/data/projects",
                                  headers=headers, data=project_data, cookies=self.cookies)
         if response.status_code == 200:
             # If successful return XNATProject object
@@ -201,7 +207,7 @@ class XNAT():
         Raises:
             HTTPException: If the projects cannot be retrieved.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.server + "/xapi/access/projects", cookies=self.cookies)
 
         if response.status_code == 200:
@@ -225,6 +231,36 @@ class XNAT():
             logger.error(msg)
             raise HTTPException(msg)
 
+    def get_user_role(self, project_name: str) -> str:
+        """
+        Retrieves the role of the authenticated user of this session in a project, without retrieving the project itself.
+
+        Args:
+            project_name (str): The name of the project.
+
+        Returns:
+            str: The user role. Either Owners, Members, Collaborators or an empty string.
+
+        Raises:
+            HTTPException: If the user role cannot be retrieved.
+        """
+        response = pooled_session.get(
+            self.server + f"/data/projects/{project_name}/users", cookies=self.cookies)
+
+        if response.status_code == 200:
+            # Look up the authenticated user once, not for every project user
+            username = self.user
+            # Get the autheticated user's role in a project
+            for element in response.json()['ResultSet']['Result']:
+                if element['login'] == username:
+                    return str(element['displayname'])
+            # User exists but no user role was specified
+            return ''
+        else:
+            msg = "Something went wrong trying to retrieve your user role. " + str(response.status_code)
+            logger.error(msg)
+            raise HTTPException(msg)
+
     def get_directory(self, project_name: str, directory_name: str) -> 'XNATDirectory': # type: ignore
         from pacs2go.data_interface.xnat import XNATDirectory
         """
@@ -1,11 +1,11 @@
 import os
 from typing import List
 
-import requests
 from natsort import natsorted
 from werkzeug.exceptions import Forbidden, HTTPException, NotFound
 
 from pacs2go.data_interface.logs.config_logging import logger
+from pacs2go.data_interface.xnat.utils.http_session import pooled_session
 from pacs2go.data_interface.xnat import XNATProject
 
 class XNATDirectory():
@@ -27,7 +27,7 @@ class XNATDirectory():
         self.project = project
 
         # Get all the projects directories, single GET is only possible for exists() (due to XNAT API behavior)
-        response = requests.get(
+        response = pooled_session.get(
             self.project.connection.server + f"/data/projects/{self.project.name}/resources", cookies=self.project.connection.cookies)
 
         if not response.status_code == 200:
@@ -45,7 +45,7 @@ class XNATDirectory():
         Returns:
             bool: True if the directory exists, False otherwise.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.project.connection.server + f"/data/projects/{self.project.name}/resources/{self.name}", cookies=self.project.connection.cookies)
 
         if response.status_code == 200:
@@ -61,7 +61,7 @@ class XNATDirectory():
             Forbidden: If the user does not have permission to delete the directory. (Only project owner prevails these rights.)
             HTTPException: If the directory cannot be deleted.
         """
-        response = requests.delete(
+        response = pooled_session.delete(
             self.project.connection.server + f"/data/projects/{self.project.name}/resources/{self.name}", cookies=self.project.connection.cookies)
 
         if response.status_code == 403:
@@ -100,7 +100,7 @@ class XNATDirectory():
         Raises:
             HTTPException: If the files cannot be retrieved.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.project.connection.server + f"/data/projects/{self.project.name}/resources/{self.name}/files?format=json&sortBy=Name", cookies=self.project.connection.cookies)
 
         if response.status_code == 200:
@@ -138,7 +138,7 @@ class XNATDirectory():
             HTTPException: If the directory data cannot be downloaded.
         """
         # https://wiki.xnat.org/display/XAPI/How+To+Download+Files+via+the+XNAT+REST+API
-        response = requests.get(
+        response = pooled_session.get(
             self.project.connection.server + f"/data/projects/{self.project.name}/resources/{self.name}/files?format=zip", cookies=self.project.connection.cookies)
 
         if response.status_code == 200:
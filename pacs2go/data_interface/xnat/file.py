@@ -1,11 +1,11 @@
 import os
 
-import requests
 from werkzeug.exceptions import Forbidden, HTTPException, NotFound
 
 from pacs2go.data_interface.logs.config_logging import logger
 from pacs2go.data_interface.xnat import XNATDirectory
 from pacs2go.data_interface.xnat.utils.constants import file_format, image_file_suffixes
+from pacs2go.data_interface.xnat.utils.http_session import pooled_session
 
 class XNATFile():
     """Represents a file within an XNAT directory."""
@@ -31,7 +31,7 @@ class XNATFile():
             self._metadata = metadata
         else:
             # Get all files from this file's directory (retrieving the metadata of a single file via a GET is not possible)
-            response = requests.get(
+            response = pooled_session.get(
                 self.directory.project.connection.server + f"/data/projects/{self.directory.project.name}/resources/{self.directory.name}/files", cookies=self.directory.project.connection.cookies)
 
             if response.status_code == 200:
@@ -125,7 +125,8 @@ class XNATFile():
         # Uses retrieved URI as endpoint
         # Useful for xnat compressed uploads where endpoint contains more than just filename (folders etc)
         # Example: '/data/projects/8412ac46-3752-4c3a-a2e1-73d9fa63e9e5_test1/resources/1118/files/jpegs_25/Case-3-A14-39214-1868.jpg'
-        response = requests.get(
+        # Pooled keep-alive connections, file data is often fetched for many files in a row (and concurrently)
+        response = pooled_session.get(
             self.directory.project.connection.server + self._metadata['URI'], cookies=self.directory.project.connection.cookies)
 
         if response.status_code == 200:
@@ -136,6 +137,33 @@ class XNATFile():
             logger.error(msg)
             raise HTTPException(msg)
 
+    def read_head(self, max_bytes: int) -> bytes:
+        """
+        Returns up to the first max_bytes of the file data. Only this part is transferred, the rest of the file is not downloaded.
+
+        Args:
+            max_bytes (int): Maximum number of bytes to read.
+
+        Returns:
+            bytes: The beginning of the file data.
+
+        Raises:
+            HTTPException: If the file data cannot be retrieved.
+        """
+        with pooled_session.get(
+                self.directory.project.connection.server + self._metadata['URI'], cookies=self.directory.project.connection.cookies, stream=True) as response:
+            if response.status_code == 200:
+                head = b''
+                for chunk in response.iter_content(chunk_size=min(max_bytes, 64 * 1024)):
+                    head += chunk
+                    if len(head) >= max_bytes:
+                        break
+                return head[:max_bytes]
+            else:
+                msg = f"The file data for [{self.name}] could not be retrieved. " + str(response.status_code)
+                logger.error(msg)
+                raise HTTPException(msg)
+
     def exists(self) -> bool:
         """
         Checks if the file to this file object actually exists on this XNAT server.
@@ -143,7 +171,7 @@ class XNATFile():
         Returns:
             bool: True if the file exists, False otherwise.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.directory.project.connection.server + f"/data/projects/{self.directory.project.name}/resources/{self.directory.name}/files/{self.name}", cookies=self.directory.project.connection.cookies)
 
         if response.status_code == 200:
@@ -164,7 +192,7 @@ class XNATFile():
         Raises:
             HTTPException: If the file cannot be downloaded.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.directory.project.connection.server + f"/data/projects/{self.directory.project.name}/resources/{self.directory.name}/files/{self.name}", cookies=self.directory.project.connection.cookies)
 
         if response.status_code == 200:
@@ -186,7 +214,7 @@ class XNATFile():
             Forbidden: If the user does not have permission to delete the file. (Only project owner prevails these rights.)
             HTTPException: If the file cannot be deleted.
         """
-        response = requests.delete(
+        response = pooled_session.delete(
             self.directory.project.connection.server + f"/data/projects/{self.directory.project.name}/resources/{self.directory.name}/files/{self.name}", cookies=self.directory.project.connection.cookies)
 
         if response.status_code == 403:
@@ -3,13 +3,14 @@ import os
 import pathlib
 import zipfile
 from tempfile import TemporaryDirectory
+from threading import Lock
 from typing import List, Sequence, Union
 
-import requests
 from natsort import natsorted
 from werkzeug.exceptions import Forbidden, HTTPException, NotFound
 
 from pacs2go.data_interface.logs.config_logging import logger
+from pacs2go.data_interface.xnat.utils.http_session import pooled_session
 from pacs2go.data_interface.xnat.utils.constants import allowed_file_suffixes, file_format, image_file_suffixes
 from pacs2go.data_interface.xnat import XNAT
 
@@ -42,8 +43,11 @@ class XNATProject():
         """
         self.connection = connection
         self.name = name
+        # Cookies for file uploads, resolved on the first upload (see _get_upload_cookies)
+        self._upload_cookies = None
+        self._upload_cookies_lock = Lock()
         
-        response = requests.get(
+        response = pooled_session.get(
             self.connection.server + f"/data/projects/{self.name}?format=json", cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -88,7 +92,7 @@ class XNATProject():
             """
 
         # Put new description
-        response = requests.put(
+        response = pooled_session.put(
             self.connection.server + f"/data/projects/{self.name}", headers=headers, data=project_data, cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -133,7 +137,7 @@ class XNATProject():
             """
 
         # Put new keywords
-        response = requests.put(
+        response = pooled_session.put(
             self.connection.server + f"/data/projects/{self.name}", headers=headers, data=project_data, cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -158,7 +162,7 @@ class XNATProject():
         Raises:
             HTTPException: If the owners cannot be retrieved.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.connection.server + f"/data/projects/{self.name}/users", cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -184,7 +188,7 @@ class XNATProject():
         Raises:
             HTTPException: If the members cannot be retrieved.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.connection.server + f"/data/projects/{self.name}/users", cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -210,7 +214,7 @@ class XNATProject():
         Raises:
             HTTPException: If the collaborators cannot be retrieved.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.connection.server + f"/data/projects/{self.name}/users", cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -236,20 +240,7 @@ class XNATProject():
         Raises:
             HTTPException: If the user role cannot be retrieved.
         """
-        response = requests.get(
-            self.connection.server + f"/data/projects/{self.name}/users", cookies=self.connection.cookies)
-
-        if response.status_code == 200:
-            # Get the autheticated user's role in a project
-            for element in response.json()['ResultSet']['Result']:
-                if element['login'] == self.connection.user:
-                    return str(element['displayname'])
-            # User exists but no user role was specified
-            return ''
-        else:
-            msg = "Something went wrong trying to retrieve your user role. " + str(response.status_code)
-            logger.error(msg)
-            raise HTTPException(msg)
+        return self.connection.get_user_role(self.name)
         
     def grant_rights_to_user(self, user: str, level: str) -> None:
         """
@@ -262,7 +253,7 @@ class XNATProject():
         Raises:
             HTTPException: If the rights cannot be granted.
         """
-        response = requests.put(
+        response = pooled_session.put(
             self.connection.server + f"/data/projects/{self.name}/users/{level}/{user}", cookies=self.connection.cookies)
         if not response.status_code == 200:
             # Attention: the status code is 200 even if the user does not exist, bc originally the server then sends an invite to the stated email.
@@ -280,9 +271,9 @@ class XNATProject():
         Raises:
             HTTPException: If the rights cannot be revoked.
         """
-        response = requests.delete(
+        response = pooled_session.delete(
             self.connection.server + f"/data/projects/{self.name}/users/Members/{user}", cookies=self.connection.cookies)
-        response_2 = requests.delete(
+        response_2 = pooled_session.delete(
             self.connection.server + f"/data/projects/{self.name}/users/Collaborators/{user}", cookies=self.connection.cookies)
         if not (response.status_code == 200 or response_2.status_code == 200):
             # Attention: the status code is 200 even if the user does not exist, bc originally the server then sends an invite to the stated email.
@@ -298,7 +289,7 @@ class XNATProject():
         Returns:
             bool: True if the project exists, False otherwise.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.connection.server + f"/data/projects/{self.name}", cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -341,7 +332,7 @@ class XNATProject():
             Forbidden: If the user does not have permission to delete the project. (Only project "owners" are able to delete their project.)
             HTTPException: If the project cannot be deleted.
         """
-        response = requests.delete(
+        response = pooled_session.delete(
             self.connection.server + f"/data/projects/{self.name}", cookies=self.connection.cookies)
 
         if response.status_code == 403:
@@ -400,7 +391,7 @@ class XNATProject():
         Raises:
             HTTPException: If the directories cannot be retrieved.
         """
-        response = requests.get(
+        response = pooled_session.get(
             self.connection.server + f"/data/projects/{self.name}/resources?sortBy=label", cookies=self.connection.cookies)
 
         if response.status_code == 200:
@@ -484,22 +475,12 @@ class XNATProject():
 
             if tags_string == '':
                 tags_string = 'No tags'
-            cookies=self.connection.cookies
-            
-            ##### Dirty Workaround to create legit cookies for Member user role (see issue #35) ####
-            if self.your_user_role == 'Members':
-                data = {"username": os.getenv("XNAT_USER"), "password": os.getenv("XNAT_PASS")}
-                headers = {"Content-Type": "application/x-www-form-urlencoded"}
-                # Authenticate 'user' via REST API
-                response_fake_auth = requests.post(
-                self.connection.server + "/data/services/auth", data=data, headers=headers)
-                cookies = {"JSESSIONID": response_fake_auth.text}
-            ########
+            cookies = self._get_upload_cookies()
 
             if xnat_compressed_upload:
                 # Open passed file and POST to XNAT endpoint with compressed upload (files will be extracted automatically)
                 with open(file_path, "rb") as file:
-                    response = requests.post(
+                    response = pooled_session.post(
                         self.connection.server + f"/data/projects/{self.name}/resources/{directory_name}/files?extract={zip_extraction}&tags={tags_string}", files={'file.zip': file}, cookies=cookies)
 
                 if response.status_code == 200:
@@ -532,6 +513,31 @@ class XNATProject():
         else:
             raise ValueError("The input is not a zipfile.")
 
+    def _get_upload_cookies(self) -> dict:
+        """
+        Returns the cookies to upload files with. The user role is only looked up on the first upload of this
+        project object, a zip upload inserts thousands of files (concurrently) through the same object.
+
+        Returns:
+            dict: The cookies for the upload requests.
+        """
+        with self._upload_cookies_lock:
+            if self._upload_cookies is None:
+                cookies = self.connection.cookies
+
+                ##### (Dirty) Workaround to create legit cookies for Member user role (see issue #35) ####
+                if self.your_user_role == 'Members':
+                    data = {"username": os.getenv('XNAT_USER'), "password": os.getenv('XNAT_PASS')}
+                    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+                    # Authenticate 'user' via REST API
+                    response_fake_auth = pooled_session.post(
+                    self.connection.server + "/data/services/auth", data=data, headers=headers)
+                    cookies = {"JSESSIONID": response_fake_auth.text}
+                ########
+
+                self._upload_cookies = cookies
+            return self._upload_cookies
+
     # Single file upload to given project
     def insert_file_into_project(self, file_path: str, file_id:str='', directory_name: str = '', tags_string: str = '') -> 'XNATFile': # type: ignore
         from pacs2go.data_interface.xnat import XNATDirectory, XNATFile
@@ -583,22 +589,14 @@ class XNATProject():
                 # REST query parameter string to set metadata
                 parameter = f"format={file_format[suffix]}&tags={tags_string}&content={file_content}"
 
-                cookies = self.connection.cookies
-
-                ##### (Dirty) Workaround to create legit cookies for Member user role (see issue #35) ####
-                if self.your_user_role == 'Members':
-                    data = {"username": os.getenv('XNAT_USER'), "password": os.getenv('XNAT_PASS')}
-                    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-                    # Authenticate 'user' via REST API
-                    response_fake_auth = requests.post(
-                    self.connection.server + "/data/services/auth", data=data, headers=headers)
-                    cookies = {"JSESSIONID": response_fake_auth.text}
-                ########
+                cookies = self._get_upload_cookies()
 
-                # Open passed file and POST to XNAT endpoint
+                # Open passed file and POST it to XNAT as request body (inbody=true). A file object is streamed by requests,
+                # whereas a multipart form would first be assembled in memory with a copy of the whole file.
                 with open(file_path, "rb") as file:
-                    response = requests.post(
-                            self.connection.server + f"/data/projects/{self.name}/resources/{directory_name}/files/{file_id}?{parameter}", files={'upload_file': file}, cookies=cookies)
+                    response = pooled_session.post(
+                            self.connection.server + f"/data/projects/{self.name}/resources/{directory_name}/files/{file_id}?{parameter}&inbody=true",
+                            data=file, headers={"Content-Type": "application/octet-stream"}, cookies=cookies)
 
                 if response.status_code == 200:
                     # Return inserted file
@@ -0,0 +1,33 @@
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Size of the keep-alive connection pool towards the XNAT server (per worker process)
+POOL_MAXSIZE = 32
+
+# Pooled connections may have been closed by the XNAT server while idle. Reads are retried once on a fresh
+# connection instead of failing the user's request. Only idempotent methods are retried, uploads never are.
+POOL_RETRY = Retry(total=2, connect=2, read=1, status=0, allowed_methods=frozenset({'GET', 'HEAD'}))
+
+
+def _create_pooled_session() -> requests.Session:
+    """
+    Creates a requests session that keeps connections to the XNAT server alive and reuses them across requests and threads.
+
+    The session is shared by all users of a worker process, hence it must never store cookies.
+    Authentication cookies are passed per request instead.
+
+    Returns:
+        requests.Session: The pooled session.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=POOL_RETRY)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+pooled_session = _create_pooled_session()
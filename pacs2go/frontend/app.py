@@ -6,6 +6,7 @@ from dash import (ALL, Dash, Input, Output, dcc, html, no_update,
                   page_container, page_registry)
 from dash.exceptions import PreventUpdate
 from dotenv import load_dotenv
+from plotly.io import json as plotly_json
 from flask import Flask, redirect, request, session
 from flask_login import LoginManager, current_user, login_user
 from werkzeug.middleware.profiler import ProfilerMiddleware
@@ -28,6 +29,10 @@ server.config.update(SECRET_KEY=os.getenv("SECRET_KEY"))
 app = Dash(name="xnat2go", pages_folder="pacs2go/frontend/pages", use_pages=True, server=server,
            external_stylesheets=[dbc.themes.BOOTSTRAP, dbc.icons.BOOTSTRAP], suppress_callback_exceptions=True,update_title='Updating PACS2go...', assets_folder='pacs2go/frontend/assets')
 
+# Dash serializes layouts and callback responses through plotly's JSON encoder, not through Flask's JSON provider.
+# Pin it to orjson (part of the requirements) instead of relying on the 'auto' lookup falling back to json silently.
+plotly_json.config.default_engine = 'orjson'
+
 
 
 #################
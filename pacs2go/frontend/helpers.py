@@ -1,8 +1,15 @@
 import base64
+import hashlib
+import os
+import time
+import uuid
 from io import BytesIO
+from threading import Lock, Thread
+from typing import Callable, Hashable, Optional, Tuple
 
+from cachetools import LRUCache, TTLCache
 from dash import dcc, html, page_registry
-from flask import session
+from flask import g, session
 from flask_login import current_user
 
 from pacs2go.data_interface.pacs_data_interface import Connection
@@ -23,11 +30,246 @@ def get_connection():
     if current_user.is_authenticated:
         user = current_user.id
         session_id = session.get("session_id")
-        return Connection(server=server_url, username=user, session_id=session_id, kind=connection_type)
+        # One connection per request (flask.g is reset after each request), shared by all lookups of a callback
+        connection = g.get('connection')
+        if connection is None or connection.username != user or connection.session_id != session_id:
+            connection = Connection(server=server_url, username=user, session_id=session_id, kind=connection_type)
+            g.connection = connection
+        return connection
     else:
         pass
 
 
+#--- Caches ---#
+
+# Every cache lives in the memory of a single worker process and is shared by that worker's threads.
+# Invalidation only reaches the worker that handled the change: the other workers keep serving their
+# entries until the TTL runs out, so changes show up there with a delay of at most the cache's TTL.
+class LockedCache:
+    """Thread safe TTL cache (LRU cache if no TTL is given) with get-or-compute lookups."""
+
+    _missing = object()
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None) -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl) if ttl else LRUCache(maxsize=maxsize)
+        self._lock = Lock()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._cache
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            return self._cache.get(key, default)
+
+    def set(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._cache[key] = value
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        # The value is computed outside of the lock, concurrent misses may compute it more than once
+        value = self.get(key, self._missing)
+        if value is self._missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+        # Drops all entries whose key matches the predicate
+        with self._lock:
+            for key in [key for key in self._cache.keys() if predicate(key)]:
+                self._cache.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+#--- Project list cache ---#
+
+# The user's role in every project, keyed by user. Determining the roles requires one XNAT
+# request per project, so they are kept for a short while (changes made through other workers
+# show up after at most 30 seconds).
+project_roles_cache = LockedCache(maxsize=256, ttl=30)
+
+
+def get_project_roles() -> dict:
+    return project_roles_cache.get_or_compute(current_user.id, lambda: get_connection().get_project_roles())
+
+
+def get_accessible_project_names():
+    # Projects the user has any role in
+    return [name for name, role in get_project_roles().items() if role != '']
+
+
+def get_uploadable_project_names():
+    # Projects the user may upload files to
+    return [name for name, role in get_project_roles().items() if role in ('Owners', 'Members')]
+
+
+def invalidate_project_roles():
+    # Projects were created or deleted or user rights changed -> drop the roles of all users
+    project_roles_cache.clear()
+
+
+#--- Favorites cache ---#
+
+# The user's favorited directories as (project name, display name, unique name), keyed by user.
+# Retrieving them instantiates every favorited directory, they only change when the user toggles a favorite
+# (a toggle handled by another worker shows up after at most 60 seconds).
+favorites_cache = LockedCache(maxsize=256, ttl=60)
+
+
+def get_favorites() -> list:
+    return favorites_cache.get_or_compute(
+        current_user.id,
+        lambda: [(d.project.name, d.display_name, d.unique_name) for d in get_connection().get_favorites(current_user.id)])
+
+
+def invalidate_favorites(user_id: str):
+    # User (un)favorited a directory -> drop only that user's favorites
+    favorites_cache.pop(user_id)
+
+
+#--- Directory page caches ---#
+
+# Short lived caches of the directory page. Changes made through another worker (or by another user of the
+# same project) show up after at most the TTL of the respective cache.
+# Blocks of the files table and the number of matching files, keyed by (user, directory, filter, block).
+files_block_cache = LockedCache(maxsize=64, ttl=10)
+# Rendered pages of the subdirectory table and the number of matching subdirectories, keyed by (user, directory, filter, page).
+subdirectories_page_cache = LockedCache(maxsize=128, ttl=10)
+# Resolved directories, keyed by (user, project, directory).
+directory_cache = LockedCache(maxsize=256, ttl=3)
+
+
+def invalidate_files_page_cache(directory_name: str):
+    # Drop all cached blocks of a directory after its files were changed
+    files_block_cache.invalidate(lambda key: key[1] == directory_name)
+
+
+def invalidate_subdirectories_page_cache(directory_name: str):
+    # Drop all cached subdirectory pages of a directory after a subdirectory was added or removed
+    subdirectories_page_cache.invalidate(lambda key: key[1] == directory_name)
+
+
+def invalidate_cached_directory(directory_name: str):
+    # Drop a directory from the cache (for all users) after it or its files were changed
+    directory_cache.invalidate(lambda key: key[2] == directory_name)
+
+
+def invalidate_project_directory_caches(project_name: str):
+    # An upload may have added files and (nested) directories anywhere in the project -> drop all of its directories
+    prefix = project_name + '::'
+    files_block_cache.invalidate(lambda key: key[1].startswith(prefix))
+    subdirectories_page_cache.invalidate(lambda key: key[1].startswith(prefix))
+    directory_cache.invalidate(lambda key: key[1] == project_name)
+
+
+#--- Background jobs ---#
+
+# Long running work (archives of selected files, uploads to XNAT) runs in a background thread of the worker
+# that received the request. Its outcome is written to a spool directory shared by all worker processes, as
+# the polling requests may be served by other workers:
+#   <job path>.part   while the job writes its result
+#   <job path>        the result, once complete
+#   <job path>.error  the error message, if the job failed
+# While a job is queued or running, its worker touches the .part file every JOB_HEARTBEAT_INTERVAL seconds.
+# A job whose worker process died leaves no outcome, the polling gives up after a timeout without progress.
+
+JOB_HEARTBEAT_INTERVAL = 30
+# Job paths of this process that are queued or running
+running_jobs = set()
+running_jobs_lock = Lock()
+job_heartbeat_thread = None
+
+
+def job_heartbeat():
+    while True:
+        time.sleep(JOB_HEARTBEAT_INTERVAL)
+        with running_jobs_lock:
+            job_paths = list(running_jobs)
+        for job_path in job_paths:
+            try:
+                os.utime(job_path + '.part')
+            except OSError:
+                # Job just finished
+                continue
+
+
+def get_job_path(spool_dir: str, job_id: str, suffix: str = '') -> str:
+    # Only the user who started a job can retrieve its outcome. Raises ValueError for malformed job ids.
+    user = hashlib.blake2b(str(current_user.id).encode(), digest_size=8).hexdigest()
+    return os.path.join(spool_dir, f"{user}_{uuid.UUID(job_id).hex}{suffix}")
+
+
+def submit_job(executor, job_path: str, job, *args):
+    # Runs job(partial_path, *args) on the executor, see run_job
+    global job_heartbeat_thread
+    open(job_path + '.part', 'w').close()
+    with running_jobs_lock:
+        running_jobs.add(job_path)
+        if job_heartbeat_thread is None:
+            # Started on first use, so that each (forked) worker process has its own
+            job_heartbeat_thread = Thread(target=job_heartbeat, daemon=True)
+            job_heartbeat_thread.start()
+    executor.submit(run_job, job_path, job, *args)
+
+
+def run_job(job_path: str, job, *args):
+    # Runs job(partial_path, *args) which writes its result to partial_path. The result only appears
+    # under the job path once it is complete, a failure leaves the error message instead.
+    partial_path = job_path + '.part'
+    try:
+        job(partial_path, *args)
+        os.replace(partial_path, job_path)
+    except Exception as err:
+        with open(job_path + '.error', 'w') as f:
+            f.write(str(err))
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+    finally:
+        with running_jobs_lock:
+            running_jobs.discard(job_path)
+
+
+def get_job_status(job_path: str, started: float, timeout: int) -> Tuple[str, Optional[str]]:
+    # Returns ('done', None), ('running', None) or ('error', message). The error outcome is consumed,
+    # the result is left to the caller. Progress is the start of the job or the last heartbeat or write of its result.
+    if os.path.exists(job_path + '.error'):
+        with open(job_path + '.error') as f:
+            message = f.read()
+        os.remove(job_path + '.error')
+        return 'error', message
+
+    if os.path.exists(job_path):
+        return 'done', None
+
+    try:
+        progress = max(started, os.path.getmtime(job_path + '.part'))
+    except OSError:
+        progress = started
+    if time.time() - progress > timeout:
+        return 'error', "The job did not finish in time, please try again."
+    return 'running', None
+
+
+def sweep_spool_dir(spool_dir: str, max_age: int):
+    # Removes outcomes that were never picked up (e.g. the page was closed) and leftovers of lost jobs
+    now = time.time()
+    with os.scandir(spool_dir) as entries:
+        for entry in entries:
+            try:
+                if now - entry.stat().st_mtime > max_age:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+
 #--- LOGIN utils ---#
 
 restricted_page = {}
@@ -1,38 +1,195 @@
-import base64
+import hashlib
 import io
-import json
-import math
 import os
-import shutil
-from tempfile import TemporaryDirectory
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from tempfile import TemporaryDirectory, gettempdir
+from threading import Lock
 from typing import List, Optional
+from urllib.parse import quote
 
 import dash_bootstrap_components as dbc
+import orjson
 import pandas as pd
-from dash import (ALL, Input, Output, State, callback, ctx, dash_table, dcc,
-                  html, no_update, register_page)
+from dash import (ALL, Input, Output, State, callback, clientside_callback,
+                  ctx, dash_table, dcc, get_app, html, no_update,
+                  register_page)
 from dash.exceptions import PreventUpdate
+from flask import Response, abort, request, send_file, stream_with_context
 from flask_login import current_user
+from PIL import Image
+
+try:
+    # SIMD accelerated base64 codec, API compatible with the standard library
+    import pybase64 as base64
+except ImportError:
+    import base64
 
 from pacs2go.data_interface.exceptions.exceptions import (
     DownloadException, FailedConnectionException,
     UnsuccessfulAttributeUpdateException, UnsuccessfulDeletionException,
     UnsuccessfulGetException)
 from pacs2go.data_interface.pacs_data_interface import Directory
-from pacs2go.data_interface.pacs_data_interface import Project
-from pacs2go.frontend.helpers import (colors, format_linebreaks,
-                                      get_connection, login_required_interface)
+from pacs2go.frontend.helpers import (LockedCache, colors, directory_cache,
+                                      files_block_cache, get_connection,
+                                      get_job_path, get_job_status,
+                                      invalidate_cached_directory,
+                                      invalidate_favorites,
+                                      invalidate_files_page_cache,
+                                      invalidate_subdirectories_page_cache,
+                                      login_required_interface, submit_job,
+                                      subdirectories_page_cache,
+                                      sweep_spool_dir)
 
 register_page(__name__, title='Directory - PACS2go',
               path_template='/dir/<project_name>/<directory_name>')
 
+# Image formats that are previewable in the browser and their mimetypes
+PREVIEW_MIMETYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'TIFF': 'image/tiff'}
+# Previews served by the preview route are downscaled to fit this size, the preview card is only a fraction of the viewport
+PREVIEW_SIZE = (512, 512)
+# Downscaled previews are converted to WebP once and kept on disk (shared by all workers).
+# Every change of a file yields a new preview, so the directory is pruned whenever a preview is added:
+# previews unused for PREVIEW_CACHE_MAX_AGE seconds are removed, beyond that the least recently used ones.
+PREVIEW_CACHE_DIR = os.getenv("PREVIEW_CACHE_DIR", os.path.join(gettempdir(), 'pacs2go_previews'))
+os.makedirs(PREVIEW_CACHE_DIR, exist_ok=True)
+PREVIEW_CACHE_MAX_FILES = int(os.getenv("PREVIEW_CACHE_MAX_FILES", 2000))
+PREVIEW_CACHE_MAX_AGE = int(os.getenv("PREVIEW_CACHE_MAX_AGE", 7 * 24 * 60 * 60))
+# Images up to this size (in Bytes) are still inlined as data-URI to spare the browser a request
+INLINE_PREVIEW_MAX_SIZE = 16 * 1024
+# Data-URIs of inlined previews keyed by (directory, file, last update, size), a changed file gets a new key
+inline_preview_cache = LockedCache(maxsize=256)
+# Number of CSV rows shown in the preview
+PREVIEW_CSV_ROWS = 25
+# JSON files up to this size are shown pretty printed, of larger ones only the beginning is shown as is
+PREVIEW_JSON_PRETTY_MAX_SIZE = 1024 * 1024
+PREVIEW_JSON_MAX_BYTES = 64 * 1024
+# Only this many Bytes of a CSV file are fetched for the preview, plenty for the rows shown
+PREVIEW_CSV_MAX_BYTES = 64 * 1024
+# Number of subdirectories per page of the subdirectory table
+SUBDIRECTORIES_PER_PAGE = 5
+# Maximum number of files fetched concurrently from the file store when downloading selected files
+DOWNLOAD_MAX_WORKERS = int(os.getenv("DOWNLOAD_MAX_WORKERS", 16))
+
+# Static table headers, built once at import time
+FILES_TABLE_HEADER_CELLS = [html.Th("File Name"), html.Th("Format"), html.Th("Modality"), html.Th(
+    "File Size"), html.Th("Uploaded on"), html.Th("Tags"), html.Th("Actions")]
+SUBDIRECTORIES_TABLE_HEADER = html.Thead(
+    html.Tr([html.Th("Directory Name"), html.Th("Number of Files"), html.Th("Created on"), html.Th("Last Updated on")]))
+
+# Files are fetched in blocks of this many rows, every page size of the files table divides it evenly
+FILES_BLOCK_SIZE = 200
+# Blocks of the files table are kept in files_block_cache (see the directory page caches in the helpers).
+# Page changes within a block are answered from there without touching the backend.
+# Fetches the following block in the background while the user is still looking at the end of the current one
+files_prefetch_executor = ThreadPoolExecutor(max_workers=2)
+# Rendered subdirectory table pages are kept in subdirectories_page_cache, as each row requires its own file count.
+# Resolved directories are kept in directory_cache for a few seconds, which collapses the repeated backend
+# lookups of callbacks that are fired in quick succession by the same user.
+
+# Archives of selected files are built by background jobs and spooled to disk until the page polls for them.
+# Archives that were never picked up are removed after DOWNLOAD_SPOOL_MAX_AGE seconds, the polling gives up
+# if a job showed no sign of life for DOWNLOAD_JOB_TIMEOUT seconds (e.g. its worker process was restarted).
+DOWNLOAD_SPOOL_DIR = os.getenv("DOWNLOAD_SPOOL_DIR", os.path.join(gettempdir(), 'pacs2go_downloads'))
+os.makedirs(DOWNLOAD_SPOOL_DIR, exist_ok=True)
+DOWNLOAD_SPOOL_MAX_AGE = int(os.getenv("DOWNLOAD_SPOOL_MAX_AGE", 60 * 60))
+DOWNLOAD_JOB_TIMEOUT = int(os.getenv("DOWNLOAD_JOB_TIMEOUT", 5 * 60))
+download_jobs_executor = ThreadPoolExecutor(max_workers=int(os.getenv("DOWNLOAD_JOBS", 2)))
+
+@get_app().server.route('/preview/<project_name>/<directory_name>/<file_name>')
+def serve_file_preview(project_name: str, directory_name: str, file_name: str):
+    # Stream the raw image bytes instead of embedding them base64 encoded in the page
+    if not current_user.is_authenticated:
+        abort(401)
+    try:
+        file = get_connection().get_file(project_name, directory_name, file_name)
+        if file.format not in PREVIEW_MIMETYPES:
+            abort(415)
+        # Validator derived from metadata only, so a cache hit does not fetch the file data at all
+        etag = hashlib.blake2b(f"{file.directory.unique_name}|{file.name}|{file.last_updated}|{file.size}".encode(),
+                               digest_size=8).hexdigest()
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            response = send_file(get_preview_image_path(file, etag), mimetype='image/webp')
+        response.set_etag(etag)
+        response.cache_control.private = True
+        response.cache_control.max_age = 60
+        return response
+    except (FailedConnectionException, UnsuccessfulGetException):
+        abort(404)
+
+
+def get_preview_image_path(file, etag: str) -> str:
+    # Previews are downscaled and converted to WebP on first request, later requests (and other workers) serve
+    # the cached file. This also covers TIFF, which browsers do not render.
+    path = os.path.join(PREVIEW_CACHE_DIR, f"{etag}.webp")
+    try:
+        # Mark as recently used, pruning goes by modification time
+        os.utime(path)
+    except FileNotFoundError:
+        partial_path = f"{path}.{uuid.uuid4().hex}.part"
+        with Image.open(io.BytesIO(file.data)) as img:
+            # Lets the JPEG decoder scale down by 1/2, 1/4 or 1/8 while decoding instead of decoding at full size
+            img.draft('RGB', PREVIEW_SIZE)
+            img.thumbnail(PREVIEW_SIZE, Image.BILINEAR)
+            if img.mode not in ('RGB', 'RGBA'):
+                img = img.convert('RGB')
+            img.save(partial_path, 'WEBP', quality=80)
+        os.replace(partial_path, path)
+        prune_preview_cache()
+    return path
+
+
+def prune_preview_cache():
+    # Removes expired previews (and leftovers of interrupted writes) and the least recently used
+    # previews beyond PREVIEW_CACHE_MAX_FILES. Files removed concurrently by another worker are skipped.
+    now = time.time()
+    previews = []
+    with os.scandir(PREVIEW_CACHE_DIR) as entries:
+        for entry in entries:
+            try:
+                mtime = entry.stat().st_mtime
+                if now - mtime > PREVIEW_CACHE_MAX_AGE or (entry.name.endswith('.part') and now - mtime > 60 * 60):
+                    os.remove(entry.path)
+                elif entry.name.endswith('.webp'):
+                    previews.append((mtime, entry.path))
+            except FileNotFoundError:
+                continue
+
+    if len(previews) > PREVIEW_CACHE_MAX_FILES:
+        previews.sort()
+        for _, path in previews[:len(previews) - PREVIEW_CACHE_MAX_FILES]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+
+
+@get_app().server.route('/download/dir/<project_name>/<directory_name>')
+def serve_directory_download(project_name: str, directory_name: str):
+    # Stream the zipped directory to the browser while it is being built, the first bytes leave
+    # as soon as the first file was fetched and no archive is kept in memory or on disk
+    if not current_user.is_authenticated:
+        abort(401)
+    try:
+        directory = get_connection().get_directory(project_name, directory_name)
+    except (FailedConnectionException, UnsuccessfulGetException):
+        abort(404)
+    response = Response(stream_with_context(directory.stream_as_zip()), mimetype='application/zip')
+    response.headers.set('Content-Disposition', 'attachment', filename=f"{directory.display_name}.zip")
+    return response
+
 
 def get_details(directory: dict):
-    directory = json.loads(directory)
     detail_data = []
     if directory['parameters']:
-        formatted_parameters = format_linebreaks(directory['parameters'])
-        parameters = [html.B("Parameters: "), html.Br()] + formatted_parameters
+        # The browser takes care of the line breaks
+        parameters = [html.B("Parameters: "), html.Pre(directory['parameters'], style={'whiteSpace': 'pre-wrap', 'fontFamily': 'inherit'})]
         detail_data.append(html.H6(parameters))
 
     time = html.B("Created on: "), directory['timestamp_creation'], html.B(" | Last updated on: "), directory['last_updated']
@@ -42,28 +199,53 @@ def get_details(directory: dict):
 
     return detail_data
 
-def get_single_file_preview(directory: Directory):
-    # Preview first image within the directory
-    if directory.number_of_files > 0:
-        file = directory.get_all_files()[0]
-        file = directory.get_file(file.name)
-        if file.format == 'JPEG' or file.format == 'PNG' or file.format == 'TIFF':
+def get_inline_preview_src(file) -> str:
+    # Repeated renders of an unchanged file skip fetching and encoding its data
+    key = (file.directory.unique_name, file.name, file.last_updated, file.size)
+
+    def encode():
+        encoded_image = base64.b64encode(file.data).decode("ascii")
+        return f"data:{PREVIEW_MIMETYPES[file.format]};base64,{encoded_image}"
+
+    return inline_preview_cache.get_or_compute(key, encode)
+
+
+def get_single_file_preview(directory: Directory, files: Optional[List[dict]] = None):
+    # Preview first image within the directory. If the first files page was already fetched (ordered by name)
+    # its first entry is used instead of querying for the first file again.
+    if files is not None:
+        file = directory.get_file(files[0]['name']) if files else None
+    else:
+        file = directory.get_first_file()
+    if file:
+        if file.format in PREVIEW_MIMETYPES:
             # Display jpeg, png or tiff bytes as image
-            encoded_image = base64.b64encode(file.data).decode("utf-8")
-            content = html.Img(id="my-img", className="image", width="100%",
-                               src=f"data:image/png;base64,{encoded_image}")
+            # TIFF is not rendered by browsers and always goes through the preview route
+            if file.size <= INLINE_PREVIEW_MAX_SIZE and file.format != 'TIFF':
+                src = get_inline_preview_src(file)
+            else:
+                # Larger images are fetched by the browser from the preview route
+                src = f"/preview/{quote(directory.project.name)}/{quote(directory.unique_name)}/{quote(file.name)}"
+            content = html.Img(id="my-img", className="image", width="100%", src=src)
         elif file.format == 'JSON':
             # Display contents of a JSON file
-            json_str = file.data.decode("utf-8")
-            json_data = json.loads(json_str)
-            content = html.Pre(json.dumps(json_data, indent=2))
+            if file.size <= PREVIEW_JSON_PRETTY_MAX_SIZE:
+                json_data = orjson.loads(file.data)
+                content = html.Pre(orjson.dumps(json_data, option=orjson.OPT_INDENT_2).decode())
+            else:
+                # Parsing and re-serialising large files is not worth it for a preview, show the raw beginning instead
+                head = file.read_head(PREVIEW_JSON_MAX_BYTES).decode("utf-8", errors="replace")
+                content = html.Pre(head + "\n...")
 
         elif file.format == 'CSV':
-            # Display CSV as data table
-            csv_str = file.data.decode("utf-8")
-            df = pd.read_csv(io.StringIO(csv_str))
+            # Display CSV as data table, only the beginning of the file is fetched and the rows of the first table page are parsed
+            head = file.read_head(PREVIEW_CSV_MAX_BYTES)
+            if len(head) == PREVIEW_CSV_MAX_BYTES:
+                # Drop the last line, it is most likely cut off
+                head = head[:head.rfind(b'\n') + 1] or head
+            df = pd.read_csv(io.BytesIO(head), nrows=PREVIEW_CSV_ROWS)
             content = dash_table.DataTable(df.to_dict(
-                'records'), [{"name": i, "id": i} for i in df.columns], page_size=25)
+                'records'), [{"name": i, "id": i} for i in df.columns], page_size=PREVIEW_CSV_ROWS)
         else:
             return html.Div()
 
@@ -72,55 +254,170 @@ def get_single_file_preview(directory: Directory):
             dbc.CardBody(content, className="w-25 h-25")], className="custom-card")
 
 
-def format_file_details(file: dict, index: int, new:list):
-    is_new = "*" if file['name'] in new else ""
-    tags = file['tags'] if file['tags'] else ''
-    file_size_kb = round(file['size']/1024, 2)
-    if file_size_kb < 1024:
-        formatted_size = f"{file_size_kb} KB ({file['size']} Bytes)"
-    else:
-        formatted_size = f"{round(file['size']/1024/1024, 2)} MB ({file['size']} Bytes)"
-    formatted_timestamp = file['upload']
+def format_file_details(file, index: int):
+    # file is a row of the files DataFrame built in get_files_table_rows (see itertuples)
+    # The marker is only sent for new files, most rows need no extra component
+    is_new = html.B("*", title="This file has changed since you last logged in.", style={'color': 'red'}) if file.is_new else None
     checkbox = dbc.Checklist(
         id={'type': 'file_selection', 'index': index},
-        options=[{"label": "", "value": file['name']}],
+        options=[{"label": "", "value": file.name}],
         value=[],
         inline=True,
         style={"maxWidth":"10px","margin-right":"0px"},
     )
     return [html.Td(index + 1),
             html.Td(checkbox),
-            html.Td([dcc.Link(file['name'], href=f"/viewer/{file['associated_project']}/{file['associated_directory']}/{file['name']}", className="text-decoration-none", 
+            html.Td([dcc.Link(file.name, href=f"/viewer/{file.associated_project}/{file.associated_directory}/{file.name}", className="text-decoration-none", 
                               style={'color': colors['links']}),        
-                    html.B(is_new,title="This file has changed since you last logged in.",style={'color': 'red'})]),
-            html.Td(file['format']),
-            html.Td(file['modality']),
-            html.Td(formatted_size),
-            html.Td(formatted_timestamp, title=f"Last Updated On: {file['last_updated']}"),
-            html.Td(tags),
-            html.Td(html.Div([modal_edit_file(file), 
-                     dbc.Button([html.I(className="bi bi-download")], class_name="me-1", outline=True, color="success", id={'type': 'btn_download_file', 'index': file['name']}),
-                     modal_delete_file(file), 
+                    is_new]),
+            html.Td(file.format),
+            html.Td(file.modality),
+            html.Td(file.formatted_size),
+            html.Td(file.upload, title=f"Last Updated On: {file.last_updated}"),
+            html.Td(file.tags),
+            # Row buttons only identify the file, the modals are shared (see modal_edit_file and modal_delete_file)
+            html.Td(html.Div([
+                     dbc.Button([html.I(className="bi bi-pencil")], id={'type': 'edit_file_in_list', 'index': file.name}, size="md", color="success", class_name="me-1") 
+                        if file.user_rights in ('Owners', 'Members') else None,
+                     dbc.Button([html.I(className="bi bi-download")], class_name="me-1", outline=True, color="success", id={'type': 'btn_download_file', 'index': file.name}),
+                     dbc.Button([html.I(className="bi bi-trash")], id={'type': 'delete_file', 'index': file.name}, size="md", color="danger", class_name="me-1") 
+                        if file.user_rights == 'Owners' else None,
                      ], style={'display': 'flex', 'justifyContent': 'space-evenly', 'alignItems': 'center'}))
             ]
 
-def get_files_table(directory: dict, files: dict = None, filter: str = '', active_page: int = 1, quantity:int = 20, new:list = []):
+def get_files_block(directory: dict, filter: str, block: int) -> tuple:
+    # Returns a block of FILES_BLOCK_SIZE files and the total number of files matching the filter
+    key = (current_user.id, directory['unique_name'], filter, block)
+
+    def fetch():
+        dir = get_cached_directory(directory['associated_project'], directory['unique_name'])
+        # Filter files based on the provided tag filter, quantity and offset
+        return dir.get_files_page(filter, block + 1, FILES_BLOCK_SIZE)
+
+    return files_block_cache.get_or_compute(key, fetch)
+
+
+def get_files_page(directory: dict, filter: str, active_page: int, quantity: int) -> tuple:
+    # Returns the files of the requested page and the total number of files matching the filter.
+    # The page is sliced out of the cached block(s) containing it.
+    offset = (active_page - 1) * quantity
+    first_block = offset // FILES_BLOCK_SIZE
+    last_block = (offset + quantity - 1) // FILES_BLOCK_SIZE
+    files = []
+    for block in range(first_block, last_block + 1):
+        block_files, total = get_files_block(directory, filter, block)
+        files.extend(block_files)
+    start = offset - first_block * FILES_BLOCK_SIZE
+
+    # The next page reaches into the following block -> have it ready by the time the user pages on
+    next_block_start = (last_block + 1) * FILES_BLOCK_SIZE
+    if offset + 2 * quantity > next_block_start and next_block_start < total:
+        prefetch_files_block(directory, filter, last_block + 1)
+    return files[start:start + quantity], total
+
+
+def peek_files_block(directory_name: str, filter: str, block: int) -> Optional[List[dict]]:
+    # Returns the files of a block if it is cached, without fetching it
+    files_block = files_block_cache.get((current_user.id, directory_name, filter, block))
+    return files_block[0] if files_block is not None else None
+
+
+def prefetch_files_block(directory: dict, filter: str, block: int):
+    # Puts a block into the cache in the background, unless it is cached already
+    key = (current_user.id, directory['unique_name'], filter, block)
+    if key in files_block_cache:
+        return
+    # Resolved in the request thread, the background thread has no request context
+    dir = get_cached_directory(directory['associated_project'], directory['unique_name'])
+
+    def fetch():
+        try:
+            files_block = dir.get_files_page(filter, block + 1, FILES_BLOCK_SIZE)
+        except UnsuccessfulGetException:
+            # Not critical, the block is fetched on demand instead
+            return
+        files_block_cache.set(key, files_block)
+
+    files_prefetch_executor.submit(fetch)
+
+
+def get_subdirectories_page(project_name: str, directory_name: str, filter: str, page: int) -> tuple:
+    # Returns the rendered subdirectory table of the requested page and the total number of matching subdirectories
+    key = (current_user.id, directory_name, filter or '', page)
+
+    def render():
+        directory = get_cached_directory(project_name, directory_name)
+        subdirectories, total = directory.get_subdirectories_page(filter=filter, page=page, size=SUBDIRECTORIES_PER_PAGE)
+        return get_subdirectories_table(subdirectories), total
+
+    return subdirectories_page_cache.get_or_compute(key, render)
+
+
+def get_cached_directory(project_name: str, directory_name: str) -> Directory:
+    # Returns the requested directory, served from the cache if it was resolved within the cache's TTL
+    key = (current_user.id, project_name, directory_name)
+    return directory_cache.get_or_compute(key, lambda: get_connection().get_directory(project_name, directory_name))
+
+
+def get_selected_download_path(job_id: str) -> str:
+    # Archives live in the download spool directory, see the background job helpers
+    return get_job_path(DOWNLOAD_SPOOL_DIR, job_id, '.zip')
+
+
+def get_selected_file_names(directory: Directory, selected_files_values: Optional[list], use_all_files: bool) -> List[str]:
+    # Names of the files a bulk action applies to: either all files of the directory or the checked rows
+    if use_all_files:
+        return directory.get_all_file_names()
+    # Flatten the list of lists into a single list of selected file names
+    return list(chain.from_iterable(selected_files_values or []))
+
+
+def write_selected_files_archive(archive_path: str, file_objects: list):
+    # Background job (see run_job): fetches the files concurrently and writes them into the archive in a single pass
+    # Medical image data is mostly compressed already, so the entries are stored instead of deflated
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED) as zip_file:
+        zip_lock = Lock()
+
+        def fetch_and_save(file):
+            data = file.data
+            with zip_lock:
+                zip_file.writestr(file.name, data)
+
+        # Fetching is network bound, so the files are retrieved concurrently
+        with ThreadPoolExecutor(max_workers=min(DOWNLOAD_MAX_WORKERS, len(file_objects))) as executor:
+            list(executor.map(fetch_and_save, file_objects))
+
+
+def get_files_table_rows(files: List[dict], active_page: int = 1, quantity: int = 20, new: Optional[list] = None):
+    # Rows of one page of the files table, this is the only part of the table that changes on a page click
     rows = []
-    directory = json.loads(directory)
+    # Set for O(1) membership tests of the new files
+    new_set = set(new) if new else frozenset()
+
+    if files:
+        # Derive the display columns for the whole page at once instead of per row
+        df = pd.DataFrame(files)
+        size_kb = (df['size']/1024).round(2)
+        size_mb = (df['size']/1024/1024).round(2)
+        df['formatted_size'] = (size_kb.astype(str) + " KB").where(size_kb < 1024, size_mb.astype(str) + " MB") \
+            + " (" + df['size'].astype(str) + " Bytes)"
+        df['is_new'] = df['name'].isin(new_set)
+        df['tags'] = df['tags'].fillna('')
 
-    if not files:
-        dir = get_connection().get_directory(project_name=directory['associated_project'], directory_name=directory['unique_name'])
+        # Get file information as rows for table
+        for index, file_info in enumerate(df.itertuples(index=False), start=(active_page-1)*quantity):
+            rows.append(html.Tr(format_file_details(file_info, index)))
+
+    return rows
 
-        # Filter files based on the provided tag filter, quantity and offset
-        files = dir.get_all_files_sliced_and_as_json(filter, quantity, (active_page-1)*quantity)
-    
-    file_data = json.loads(files)
 
-    # Get file information as rows for table
-    for index, file_info in enumerate(file_data):
-        index = index + (active_page-1)*quantity
-        rows.append(html.Tr(format_file_details(file_info, index, new)))
+def get_files_metadata(files: List[dict]) -> dict:
+    # Modality and tags of the displayed files, the edit modal is prefilled from these in the browser
+    return {file['name']: {'modality': file['modality'], 'tags': file['tags']} for file in files}
 
+
+def get_files_table(files: List[dict], active_page: int = 1, quantity: int = 20, new: Optional[list] = None):
+    # Built once at page load, afterwards only the body ('files_table_body') is replaced
     checkbox = dbc.Checkbox(
         id="check_all_files",
         label="",
@@ -130,27 +427,25 @@ def get_files_table(directory: dict, files: dict = None, filter: str = '', activ
     # Table header
     table_header = [
         html.Thead(
-            html.Tr([html.Th(" "), html.Th(checkbox, title="Select all files"), html.Th("File Name"), html.Th("Format"), html.Th("Modality"), html.Th("File Size"), html.Th("Uploaded on"), html.Th("Tags"), html.Th("Actions")]))
+            html.Tr([html.Th(" "), html.Th(checkbox, title="Select all files")] + FILES_TABLE_HEADER_CELLS))
     ]
 
     # Only show quantity (20) rows at a time - pagination
-    table_body = [html.Tbody(rows)]
+    table_body = [html.Tbody(get_files_table_rows(files, active_page, quantity, new), id='files_table_body')]
 
     # Put together file table
     table = dbc.Table(table_header + table_body, striped=True, bordered=True, hover=True, responsive=True)
+    return table
 
-    
-    # Warning message if the data is not consistent
-    warning_message = None
-    if not directory['is_consistent']:
-        warning_message = dbc.Alert(
+
+def get_files_warning(directory: Directory):
+    # Warning message if the data is not consistent (rendered once per page load, not per page click)
+    if not directory.is_consistent:
+        return dbc.Alert(
             "Warning: The directory's metadata and file storage data are not consistent. The inconsistent files are not shown. Please contact your admin.",
             color="warning", id="warninig_files"
         )
 
-    # Return the table and the warning message
-    return [warning_message, table]
-
 
 def get_subdirectories_table(subdirectories: List['Directory'], filter: str = '', active_page: int = 1, quantity:int = 20):
     # Get list of all directory names and number of files per directory
@@ -160,21 +455,19 @@ def get_subdirectories_table(subdirectories: List['Directory'], filter: str = ''
         rows.append(html.Tr([html.Td(dcc.Link(d.display_name, href=f"/dir/{d.project.name}/{d.unique_name}", className="text-decoration-none", style={'color': colors['links']})), html.Td(
             d.number_of_files), html.Td(d.timestamp_creation), html.Td(d.last_updated)]))
 
-    table_header = [
-        html.Thead(
-            html.Tr([html.Th("Directory Name"), html.Th("Number of Files"), html.Th("Created on"), html.Th("Last Updated on")]))
-    ]
-
     table_body = [html.Tbody(rows)]
 
     # Put together directory table
-    table = dbc.Table(table_header + table_body,
+    table = dbc.Table([SUBDIRECTORIES_TABLE_HEADER] + table_body,
                       striped=True, bordered=True, hover=True, responsive=True)
     return table
 
 
-def modal_create_new_subdirectory(directory):
-    if directory.project.your_user_role == 'Owners':
+# The modals below only depend on the user's role, they are built once per role and shared by all page loads
+# (components are only serialized when the layout is sent, never modified)
+@lru_cache(maxsize=None)
+def modal_create_new_subdirectory(rights):
+    if rights == 'Owners':
         # Modal view for subdir creation
         return html.Div([
             # Button which triggers modal activation
@@ -208,8 +501,8 @@ def modal_create_new_subdirectory(directory):
         ])
 
 
-def modal_delete(directory: Directory):
-    if directory.project.your_user_role == 'Owners':
+def modal_delete(directory: Directory, rights):
+    if rights == 'Owners':
         # Modal view for directory deletion
         return html.Div([
             # Button which triggers modal activation
@@ -239,15 +532,13 @@ def modal_delete(directory: Directory):
         ])
 
 
-def modal_delete_file(file: dict):
-    if file['user_rights'] == 'Owners':
-        # Modal view for file deletion
+@lru_cache(maxsize=None)
+def modal_delete_file(rights):
+    if rights == 'Owners':
+        # Single modal view for file deletion, shared by all rows of the files table
         return html.Div([
-            dcc.Store('file', data=file['name']),
-            # Button which triggers modal activation
-            dbc.Button([html.I(className="bi bi-trash")],
-                       id={'type': 'delete_file', 'index': file['name']}, size="md", color="danger", class_name="me-1"),
-            # Actual modal view
+            # Name of the file whose delete button was clicked
+            dcc.Store('file'),
             dbc.Modal(
                 [
                     dbc.ModalHeader(dbc.ModalTitle(
@@ -258,7 +549,7 @@ def modal_delete_file(file: dict):
                     ]),
                     dbc.ModalFooter([
                         dbc.Button("Delete File",
-                                   id={'type': 'delete_file_and_close', 'index': file['name']}, color="danger"),
+                                   id='delete_file_and_close', color="danger"),
                         dbc.Button(
                             "Close", id='close_modal_delete_file', outline=True, color="success",),
                     ]),
@@ -268,9 +559,9 @@ def modal_delete_file(file: dict):
             ),
         ])
     
-def modal_edit_directory(project: Project, directory: Directory):
+def modal_edit_directory(directory: Directory, rights):
     # Modal view for project creation
-    if project.your_user_role == 'Owners' or project.your_user_role == 'Members':
+    if rights == 'Owners' or rights == 'Members':
         return html.Div([
             # Button which triggers modal activation
             dbc.Button([html.I(className="bi bi-pencil me-2"),
@@ -300,14 +591,13 @@ def modal_edit_directory(project: Project, directory: Directory):
             ),
         ])
 
-def modal_edit_file(file:dict):
-    # Modal view for project creation
-    if file['user_rights'] == 'Owners' or file['user_rights'] == 'Members':
+@lru_cache(maxsize=None)
+def modal_edit_file(rights):
+    # Single modal view for file editing, shared by all rows of the files table
+    if rights == 'Owners' or rights == 'Members':
         return html.Div([
-            dcc.Store('file_for_edit', data=file['name']),
-            # Button which triggers modal activation
-            dbc.Button([html.I(className="bi bi-pencil")], id={'type': 'edit_file_in_list', 'index': file['name']}, size="md", color="success",class_name="me-1"),
-            # Actual modal view
+            # Name of the file whose edit button was clicked
+            dcc.Store('file_for_edit'),
             dbc.Modal(
                 [
                     dbc.ModalHeader(dbc.ModalTitle(f"Edit File")),
@@ -324,7 +614,7 @@ def modal_edit_file(file:dict):
                     ]),
                     dbc.ModalFooter([
                         dbc.Button("Update File",
-                                id={'type': 'edit_file_in_list_and_close', 'index': file['name']}, color="success"),
+                                id='edit_file_in_list_and_close', color="success"),
                         dbc.Button("Close", id="close_modal_edit_file_in_list", outline=True, color="success",),
                     ]),
                 ],
@@ -333,6 +623,7 @@ def modal_edit_file(file:dict):
             ),
         ])
 
+@lru_cache(maxsize=None)
 def modal_delete_selected_files(rights):
     if rights == 'Owners':
         return html.Div([    
@@ -351,6 +642,7 @@ def modal_delete_selected_files(rights):
                 is_open=False
         )])
 
+@lru_cache(maxsize=None)
 def modal_edit_selected_files(rights):
     # Modal view for project creation
     if rights == 'Owners' or rights == 'Members':
@@ -411,6 +703,9 @@ def cb_modal_and_directory_deletion(open, close, delete_and_close, is_open, dire
                 project_name, directory_name)
             # Delete Directory
             directory.delete_directory()
+            invalidate_cached_directory(directory_name)
+            # The parent's subdirectory table lists the deleted directory
+            invalidate_subdirectories_page_cache(directory.unique_name.rsplit('::', 1)[0])
             # Close Modal View and show message
             return is_open, dbc.Alert([f"The directory {directory.display_name} has been successfully deleted! ",
                                        dcc.Link(f"Click here to go to back to the '{project_name}' project.",
@@ -450,10 +745,10 @@ def cb_modal_edit_directory_callback(open, close, edit_and_close, is_open, proje
             if parameters:
                 # Set new parameters
                 directory.set_parameters(parameters)
+                invalidate_cached_directory(directory_name)
             # Retrieve updated directory to force reload
             directory = connection.get_directory(project_name, directory_name)
-            directory_json = json.dumps(directory.to_dict())
-            return not is_open, no_update, get_details(directory_json)
+            return not is_open, no_update, get_details(directory.to_dict())
 
         except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulAttributeUpdateException) as err:
             return is_open, dbc.Alert(str(err), color="danger"), no_update
@@ -473,7 +768,6 @@ def cb_modal_edit_directory_callback(open, close, edit_and_close, is_open, proje
     State('new_subdir_parameters', 'value'),
     State("directory_name", "data"),
     State("project_name", "data"),
-    State("subdirectories_store", "data"),
     State('filter_subdirectory_tags', 'value'),
     State("pagination_subdirs", 'active_page'),
     prevent_initial_call=True)
@@ -492,16 +786,16 @@ def cb_modal_and_subdirectory_creation(open, close, create_and_close, is_open, n
         name = str(name).replace(" ", "_")
 
         try:
-            connection = get_connection()
-            directory = connection.get_directory(project_name, directory_name)
+            directory = get_cached_directory(project_name, directory_name)
             sd = Directory(directory.project, name, directory, parameters)
-            dirlist = directory.get_subdirectories(filter=filter, quantity=5, offset=(current_page-1)*5)
+            invalidate_subdirectories_page_cache(directory_name)
+            subdirectories_table, _ = get_subdirectories_page(project_name, directory_name, filter, current_page or 1)
 
             return not is_open, dbc.Alert([html.Span("A new sub-directory has been successfully created! "),
                                        html.Span(dcc.Link(f" Click here to go to the new directory {sd.display_name}.",
                                                           href=f"/dir/{project_name}/{sd.unique_name}",
                                                           className="fw-bold text-decoration-none",
-                                                          style={'color': colors['links']}))], color="success"), get_subdirectories_table(dirlist)
+                                                          style={'color': colors['links']}))], color="success"), subdirectories_table
 
         except Exception as err:
             return is_open, dbc.Alert(str(err), color="danger"), no_update
@@ -510,28 +804,19 @@ def cb_modal_and_subdirectory_creation(open, close, create_and_close, is_open, n
         raise PreventUpdate
     
 @callback( 
-    Output('subdirectory_table', 'children', allow_duplicate=True),
+    Output("pagination_subdirs", 'active_page'),
     Input('filter_subdirectory_tags_btn', 'n_clicks'),
     Input('filter_subdirectory_tags', 'value'),
-    State("pagination_subdirs", 'active_page'),
-    State("directory_name", "data"),
-    State("project_name", "data"),
     prevent_initial_call=True)
-def filter_subdirectories(n_clicks, filter, current_page, directory_name, project_name):
+def filter_subdirectories(n_clicks, filter):
     if n_clicks is None and not filter:
         raise PreventUpdate
-
-    try:
-        directory = get_connection().get_directory(project_name=project_name,directory_name=directory_name)
-        # Adjust this function call according to your data retrieval implementation
-        filtered_subdirs = directory.get_subdirectories(filter=filter, quantity=5, offset=current_page-1)
-
-        return get_subdirectories_table(filtered_subdirs)
-    except Exception as err:
-        return dbc.Alert(str(err), color="danger")
+    # Jump back to the first page, paginate_subdirectories then fetches the filtered page
+    return 1
   
 @callback( 
     Output('subdirectory_table', 'children', allow_duplicate=True),
+    Output("pagination_subdirs", 'max_value'),
     Input("pagination_subdirs", 'active_page'),
     State('filter_subdirectory_tags', 'value'),
     State("directory_name", "data"),
@@ -542,85 +827,70 @@ def paginate_subdirectories(current_page, filter, directory_name, project_name):
         raise PreventUpdate
 
     try:
-        directory = get_connection().get_directory(project_name=project_name,directory_name=directory_name)
-        # Adjust this function call according to your data retrieval implementation
-        filtered_subdirs = directory.get_subdirectories(filter=filter, quantity=5, offset=(current_page-1)*5)
+        # One page of subdirectories plus the total count for the paginator
+        subdirectories_table, total = get_subdirectories_page(project_name, directory_name, filter, current_page or 1)
 
-        return get_subdirectories_table(filtered_subdirs)
+        return subdirectories_table, max(-(-total // SUBDIRECTORIES_PER_PAGE), 1)
     except Exception as err:
-        return dbc.Alert(str(err), color="danger")  
+        return dbc.Alert(str(err), color="danger"), no_update
 
 @callback(
-    Output('files_table', 'children', allow_duplicate=True),
     Output('pagination_files', 'active_page'),
     Input('filter_file_tags_btn', 'n_clicks'),
     Input('filter_file_tags', 'value'),
     State('pagination_files', 'active_page'),
-    State('num_files_per_page_select', 'value'),
-    State('directory', 'data'),
     prevent_initial_call=True)
 # Callback for the file tag filter feature
-def cb_filter_files_table(btn, filter, active_page, quantity, directory):
-    # Filter button is clicked or the input field registers a user input
+def cb_filter_files_table(btn, filter, active_page):
+    # Filter button is clicked or the input field registers a user input:
+    # jump back to the first page, cb_reload_files_table then fetches only that slice
     if ctx.triggered_id == 'filter_file_tags_btn' or filter or active_page:
-        try:
-            if not filter:
-                filter = ''
-            return get_files_table(directory=directory, filter=filter, active_page=1, quantity=int(quantity)), 1
-        except (FailedConnectionException, UnsuccessfulGetException) as err:
-            return dbc.Alert(str(err), color="danger"), 1
+        return 1
     else:
         raise PreventUpdate
 
 
-@callback(
+# Favoriting button flips the heart icon right away, the new status is persisted by cb_favorite
+clientside_callback(
+    """
+    function(n_clicks, is_favorite) {
+        const favorite = !is_favorite;
+        const icon = {namespace: 'dash_html_components', type: 'I',
+                      props: {className: favorite ? 'bi bi-heart-fill' : 'bi bi-heart'}};
+        return [[icon], favorite];
+    }
+    """,
     Output("btn_fav_dir", "children"),
+    Output("is_favorite", "data"),
     Input("btn_fav_dir", "n_clicks"),
-    State("directory_name", "data"),
-    State("project_name", "data"),
+    State("is_favorite", "data"),
     prevent_initial_call=True,
 )
-# Callback for the favoriting (directory) feature
-def cb_favorite(n_clicks, directory_name, project_name):
-    # Favoriting button is triggered
-    if ctx.triggered_id == 'btn_fav_dir':
-        try:
-            connection = get_connection()
-            directory = connection.get_directory(project_name, directory_name)
-            if not directory.is_favorite(current_user.id):
-                directory.favorite_directory(current_user.id)
-                return [html.I(className=f"bi bi-heart-fill")]
-            else:
-                directory.remove_favorite_directory(current_user.id)
-                return [html.I(className=f"bi bi-heart")]
-
-        except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulAttributeUpdateException) as err:
-            return dbc.Alert(str(err), color="danger")
-    else:
-        raise PreventUpdate
 
 
 @callback(
-    Output("download_directory", "data", allow_duplicate=True),
-    Input("btn_download_dir", "n_clicks"),
+    Output("btn_fav_dir", "children", allow_duplicate=True),
+    Input("is_favorite", "data"),
     State("directory_name", "data"),
     State("project_name", "data"),
     prevent_initial_call=True,
 )
-# Callback for the download (directory) feature
-def cb_download(n_clicks, directory_name, project_name):
-    # Download button is triggered
-    if ctx.triggered_id == 'btn_download_dir':
-        try:
-            connection = get_connection()
-            directory = connection.get_directory(project_name, directory_name)
-            with TemporaryDirectory() as tempdir:
-                zipped_dir = directory.download(tempdir)
-                return dcc.send_file(zipped_dir)
-        except (FailedConnectionException, UnsuccessfulGetException, DownloadException) as err:
-            return dbc.Alert(str(err), color="danger")
-    else:
-        raise PreventUpdate
+# Callback for the favoriting (directory) feature
+def cb_favorite(is_favorite, directory_name, project_name):
+    try:
+        directory = get_cached_directory(project_name, directory_name)
+        # The status is set rather than toggled, so quick successive clicks end up in the last clicked state
+        if is_favorite and not directory.is_favorite(current_user.id):
+            directory.favorite_directory(current_user.id)
+        elif not is_favorite and directory.is_favorite(current_user.id):
+            directory.remove_favorite_directory(current_user.id)
+        else:
+            return no_update
+        invalidate_favorites(current_user.id)
+        return no_update
+
+    except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulAttributeUpdateException) as err:
+        return dbc.Alert(str(err), color="danger")
 
 
 @callback(
@@ -634,7 +904,8 @@ def cb_download(n_clicks, directory_name, project_name):
 def cb_download_single_file(n_clicks, directory_name, project_name):
     if isinstance(ctx.triggered_id, dict):
         # Download button in the files table is triggered
-        if ctx.triggered_id['type'] == 'btn_download_file' and any(item is not None for item in n_clicks):
+        # Only the triggering button's value is checked (re-rendered rows trigger with n_clicks None)
+        if ctx.triggered_id['type'] == 'btn_download_file' and ctx.triggered[0]['value'] is not None:
             with TemporaryDirectory() as tempdir:
                 try:
                     connection = get_connection()
@@ -650,74 +921,84 @@ def cb_download_single_file(n_clicks, directory_name, project_name):
         raise PreventUpdate
     
 
+# Delete Button in File list - remember the file and open Modal View (in the browser, no server round trip)
+clientside_callback(
+    """
+    function(n_clicks) {
+        const triggered = dash_clientside.callback_context.triggered[0];
+        if (!triggered || triggered.value == null) {
+            throw dash_clientside.PreventUpdate;
+        }
+        const file_name = JSON.parse(triggered.prop_id.slice(0, triggered.prop_id.lastIndexOf('.'))).index;
+        const label = {namespace: 'dash_bootstrap_components', type: 'Label',
+                       props: {children: `Are you sure you want to delete this file '${file_name}'?`}};
+        return [true, label, file_name];
+    }
+    """,
+    [Output('modal_delete_file', 'is_open', allow_duplicate=True),
+     Output('delete-file-content', 'children', allow_duplicate=True),
+     Output('file', 'data')],
+    Input({'type': 'delete_file', 'index': ALL}, 'n_clicks'),
+    prevent_initial_call=True
+)
+
+
 @callback(
     [Output('modal_delete_file', 'is_open'),
-     Output('delete-file-content', 'children'), Output('file', 'data'),
+     Output('delete-file-content', 'children'),
      Output('file-change', 'data', allow_duplicate=True),],
-    [Input({'type': 'delete_file', 'index': ALL}, 'n_clicks'),
-     Input('close_modal_delete_file', 'n_clicks'),
-     Input({'type': 'delete_file_and_close', 'index': ALL}, 'n_clicks')],
+    [Input('close_modal_delete_file', 'n_clicks'),
+     Input('delete_file_and_close', 'n_clicks')],
     [State('modal_delete_file', 'is_open'),
      State("directory_name", 'data'),
      State("project_name", 'data'),
-     State('file', 'data'),
-     State('pagination_files', 'active_page'),
-     State('num_files_per_page_select', 'value'),],
+     State('file', 'data'),],
     prevent_initial_call=True
 )
-# Callback for the file deletion modal view and the actual file deletion
-def cb_modal_and_file_deletion(open, close, delete_and_close, is_open, directory_name, project_name, file_name, active_page,num_files_per_page_select):
-    if isinstance(ctx.triggered_id, dict):
-        # Delete Button in File list - open/close Modal View
-        if ctx.triggered_id['type'] == "delete_file" and any(item is not None for item in open):
-            return not is_open, dbc.Label(
-                f"Are you sure you want to delete this file '{ctx.triggered_id['index']}'?"), ctx.triggered_id['index'], no_update
-        # Delete Button in the Modal View
-        elif ctx.triggered_id['type'] == 'delete_file_and_close' and any(item is not None for item in delete_and_close):
-            try:
-                connection = get_connection()
-                directory = connection.get_directory(project_name, directory_name)
-                file = directory.get_file(file_name)
-                # Delete File
-                file.delete_file()
-                # Close Modal and show message
-                return is_open, dbc.Alert(
-                    [f"The file {file.name} has been successfully deleted! "], color="success"), no_update, 1
-            except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulDeletionException) as err:
-                return not is_open, dbc.Alert(str(err), color="danger"), no_update, no_update
-        else:
-            raise PreventUpdate
-        
-    elif isinstance(ctx.triggered_id, str):
-        if ctx.triggered_id == "close_modal_delete_file" and close is not None:
-            # Close Modal View
-            return not is_open, no_update, no_update, no_update
+# Callback for closing the file deletion modal view and the actual file deletion
+def cb_modal_and_file_deletion(close, delete_and_close, is_open, directory_name, project_name, file_name):
+    # Delete Button in the Modal View
+    if ctx.triggered_id == 'delete_file_and_close' and delete_and_close is not None:
+        try:
+            directory = get_cached_directory(project_name, directory_name)
+            file = directory.get_file(file_name)
+            # Delete File
+            file.delete_file()
+            invalidate_cached_directory(directory_name)
+            invalidate_files_page_cache(directory_name)
+            # Close Modal and show message
+            return is_open, dbc.Alert(
+                [f"The file {file.name} has been successfully deleted! "], color="success"), 1
+        except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulDeletionException) as err:
+            return is_open, dbc.Alert(str(err), color="danger"), no_update
+    elif ctx.triggered_id == "close_modal_delete_file" and close is not None:
+        # Close Modal View
+        return False, no_update, no_update
     else:
         raise PreventUpdate
 
 
-@callback(
+# Edit Button in File list - open Modal View prefilled with the file's modality and tags of the displayed page
+clientside_callback(
+    """
+    function(n_clicks, files_metadata) {
+        const triggered = dash_clientside.callback_context.triggered[0];
+        if (!triggered || triggered.value == null) {
+            throw dash_clientside.PreventUpdate;
+        }
+        const file_name = JSON.parse(triggered.prop_id.slice(0, triggered.prop_id.lastIndexOf('.'))).index;
+        const metadata = (files_metadata || {})[file_name] || {};
+        return [true, metadata.modality, metadata.tags, file_name];
+    }
+    """,
     [Output('modal_edit_file_in_list', 'is_open', allow_duplicate=True),
-    Output('edit_file_in_list_modality', 'value', ),
-    Output('edit_file_in_list_tags', 'value', ),
-    Output('file_for_edit', 'data', allow_duplicate=True)],
+     Output('edit_file_in_list_modality', 'value'),
+     Output('edit_file_in_list_tags', 'value'),
+     Output('file_for_edit', 'data', allow_duplicate=True)],
     Input({'type': 'edit_file_in_list', 'index': ALL}, 'n_clicks'),
-    State("directory_name", 'data'),
-    State("project_name", 'data'),
+    State('files_page_metadata', 'data'),
     prevent_initial_call=True
 )
-def cb_open_edit_file_modal(is_open, directory_name, project_name):
-    if isinstance(ctx.triggered_id, dict):
-        # Edit Button in File list - open/close Modal View
-        if ctx.triggered_id['type'] == "edit_file_in_list" and any(item is not None for item in is_open):
-            connection = get_connection()
-            directory = connection.get_directory(project_name, directory_name)
-            file = directory.get_file(ctx.triggered_id['index'])
-            return True, file.modality, file.tags, ctx.triggered_id['index']
-        else:
-            raise PreventUpdate
-    else:
-        raise PreventUpdate
 
 
 @callback(
@@ -725,49 +1006,45 @@ def cb_open_edit_file_modal(is_open, directory_name, project_name):
      Output('edit_file_in_list_content', 'children'), 
      Output('file-change', 'data', allow_duplicate=True),], 
     [Input('close_modal_edit_file_in_list', 'n_clicks'),
-     Input({'type': 'edit_file_in_list_and_close', 'index': ALL}, 'n_clicks')],
+     Input('edit_file_in_list_and_close', 'n_clicks')],
     [State("directory_name", 'data'),
      State("project_name", 'data'),
      State('file_for_edit', 'data'),
      State('edit_file_in_list_modality', 'value'),
-     State('edit_file_in_list_tags', 'value'),
-     State('pagination_files', 'active_page'),
-     State('num_files_per_page_select', 'value'),],
+     State('edit_file_in_list_tags', 'value'),],
     prevent_initial_call=True
 )
-# Callback for the file deletion modal view and the actual file deletion
-def cb_modal_and_file_edit(close, edit_and_close, directory_name, project_name, file_name, modality, tags, active_page,num_files_per_page_select):
-    if isinstance(ctx.triggered_id, dict):
-        # Edit Button in the Modal View
-        if ctx.triggered_id['type'] == 'edit_file_in_list_and_close' and any(item is not None for item in edit_and_close):
-            try:
-                connection = get_connection()
-                directory = connection.get_directory(project_name, directory_name)
-                file = directory.get_file(file_name)
-                if modality:
-                    file.set_modality(modality)
-                if tags:
-                    file.set_tags(tags)
-                return False, dbc.Alert(
-                    [f"The file {file.name} has been successfully edited! "], color="success"), 1
-            except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulDeletionException) as err:
-                return False, dbc.Alert(str(err), color="danger"), no_update
-        else:
-            raise PreventUpdate
+# Callback for the file edit modal view and the actual file update
+def cb_modal_and_file_edit(close, edit_and_close, directory_name, project_name, file_name, modality, tags):
+    # Edit Button in the Modal View
+    if ctx.triggered_id == 'edit_file_in_list_and_close' and edit_and_close is not None:
+        try:
+            directory = get_cached_directory(project_name, directory_name)
+            file = directory.get_file(file_name)
+            if modality:
+                file.set_modality(modality)
+            if tags:
+                file.set_tags(tags)
+            invalidate_cached_directory(directory_name)
+            invalidate_files_page_cache(directory_name)
+            return False, dbc.Alert(
+                [f"The file {file.name} has been successfully edited! "], color="success"), 1
+        except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulAttributeUpdateException) as err:
+            return False, dbc.Alert(str(err), color="danger"), no_update
 
-    elif isinstance(ctx.triggered_id, str):
-        if ctx.triggered_id == "close_modal_edit_file_in_list" and close is not None:
-            # Close Modal View
-            return False, no_update, no_update
-        else:
-            raise PreventUpdate
+    elif ctx.triggered_id == "close_modal_edit_file_in_list" and close is not None:
+        # Close Modal View
+        return False, no_update, no_update
     
     else:
         raise PreventUpdate
 
 
 @callback(
-    Output('action_feedback', 'children', allow_duplicate=True), Output('download_directory_single', 'data', allow_duplicate=True),  # Assume an element to display action feedback
+    Output('action_feedback', 'children', allow_duplicate=True),
+    Output('selected_download_job', 'data'),
+    Output('selected_download_poll', 'disabled'),
+    Output('download_selected_btn', 'disabled'),
     Input('download_selected_btn', 'n_clicks'),
     State({'type': 'file_selection', 'index': ALL}, 'value'),
     State("directory_name", 'data'),
@@ -776,46 +1053,64 @@ def cb_modal_and_file_edit(close, edit_and_close, directory_name, project_name,
     prevent_initial_call=True
 )
 def handle_multiple_file_actions_download(n_clicks, selected_files_values, directory_name, project_name, use_all_files):
-    # Flatten the list of lists into a single list of selected file names
-    if use_all_files:
-        try:
-            directory = get_connection().get_directory(project_name, directory_name)
-            files = [file['name'] for file in json.loads(directory.get_all_files_sliced_and_as_json())] 
-        except (FailedConnectionException, UnsuccessfulGetException) as err:
-            dbc.Alert(str(err), color='warning') 
-    elif selected_files_values:
-        files = [file for sublist in selected_files_values for file in sublist]
-        if len(files) == 0:
-            return dbc.Alert("No files were selected.", color='warning'), no_update
-    else:
+    if not use_all_files and not selected_files_values:
         raise PreventUpdate
-        
-    if files:
-        with TemporaryDirectory() as tempdir:
-            # Create a directory named after directory_name inside the temp directory
-            dir_path = os.path.join(tempdir, directory_name)
-            os.makedirs(dir_path, exist_ok=True)
-            try:
-                connection = get_connection()
-                for file_name in files:
-                    file = connection.get_file(project_name, directory_name, file_name)
-                    # Save file to the newly created directory
-                    file_path = os.path.join(dir_path, file_name)
-                    with open(file_path, 'wb') as f:
-                        f.write(file.data)  # Assuming file.data contains the file bytes
-
-                # Path for the zip file
-                zip_path = os.path.join(tempdir, f"{directory_name}.zip")
-                # Create a zip file of the directory
-                shutil.make_archive(zip_path[:-4], 'zip', dir_path)  # Exclude the .zip extension in zip_path
-                
-                return no_update, dcc.send_file(zip_path)
-                
-            except (FailedConnectionException, UnsuccessfulGetException) as err:
-                return dbc.Alert(str(err), color='warning'), no_update
-    else:
+
+    try:
+        # Resolve the directory in the request thread (the background job has no request context)
+        directory = get_cached_directory(project_name, directory_name)
+        files = get_selected_file_names(directory, selected_files_values, use_all_files)
+        if not files:
+            return dbc.Alert("No files were selected.", color='warning'), no_update, no_update, no_update
+        # Metadata of all selected files is retrieved at once, only the file contents are fetched one by one
+        file_objects = directory.get_files_bulk(files)
+    except (FailedConnectionException, UnsuccessfulGetException) as err:
+        return dbc.Alert(str(err), color='warning'), no_update, no_update, no_update
+
+    # The archive is built in the background, the poll interval delivers it once it is ready
+    sweep_spool_dir(DOWNLOAD_SPOOL_DIR, DOWNLOAD_SPOOL_MAX_AGE)
+    job_id = uuid.uuid4().hex
+    submit_job(download_jobs_executor, get_selected_download_path(job_id), write_selected_files_archive, file_objects)
+    return dbc.Alert(f"Preparing the download of {len(file_objects)} file(s)...", color='info'), \
+        {'id': job_id, 'started': time.time()}, False, True
+
+
+@callback(
+    Output('action_feedback', 'children', allow_duplicate=True),
+    Output('download_directory_single', 'data', allow_duplicate=True),
+    Output('selected_download_job', 'data', allow_duplicate=True),
+    Output('selected_download_poll', 'disabled', allow_duplicate=True),
+    Output('download_selected_btn', 'disabled', allow_duplicate=True),
+    Input('selected_download_poll', 'n_intervals'),
+    State('selected_download_job', 'data'),
+    State("directory_name", 'data'),
+    prevent_initial_call=True
+)
+def poll_selected_files_download(n, job, directory_name):
+    if not job:
         raise PreventUpdate
 
+    try:
+        archive_path = get_selected_download_path(job['id'])
+    except (ValueError, KeyError, TypeError):
+        raise PreventUpdate
+
+    status, message = get_job_status(archive_path, job['started'], DOWNLOAD_JOB_TIMEOUT)
+    if status == 'error':
+        # Most likely some of the files were changed or removed through another worker in the meantime,
+        # a retry resolves the directory and its files anew instead of serving this worker's cached state
+        invalidate_cached_directory(directory_name)
+        invalidate_files_page_cache(directory_name)
+        return dbc.Alert(message, color='warning'), no_update, None, True, False
+
+    if status == 'running':
+        # Archive is still being written
+        raise PreventUpdate
+
+    download = dcc.send_file(archive_path, filename=f"{directory_name}.zip")
+    os.remove(archive_path)
+    return None, download, None, True, False
+
 
 @callback(
     Output('confirmation_delete_multiple_files_modal', 'is_open'),
@@ -831,39 +1126,6 @@ def toggle_confirmation_modal_delete_selected_files(delete_n_clicks, cancel_n_cl
     return not is_open  # Close the modal for either Cancel or Confirm actions
 
 
-@callback(
-    Output('action_feedback', 'children'), Output('file-change', 'data', allow_duplicate=True),
-    Input('confirm_delete_multiple_files', 'n_clicks'),
-    State({'type': 'file_selection', 'index': ALL}, 'value'),
-    State("directory_name", 'data'),
-    State("project_name", 'data'),
-    State("check_all_files", "value"),
-    prevent_initial_call=True
-)
-def confirm_deletion_selected_files(n_clicks, selected_files_values, directory_name, project_name, use_all_files):
-    if ctx.triggered_id == "confirm_delete_multiple_files" and n_clicks > 0:
-        # Flatten the list of lists into a single list of selected file names
-        try:
-            directory = get_connection().get_directory(project_name, directory_name)
-            if use_all_files:
-                files = [file['name'] for file in json.loads(directory.get_all_files_sliced_and_as_json())] 
-            elif selected_files_values:
-                files = [file for sublist in selected_files_values for file in sublist]
-            else:
-                raise PreventUpdate
-            
-            if files:
-                directory.delete_multiple_files(files)
-                return dbc.Alert(f"Deleted {len(files)} file(s).", color="warning"), 1
-            else:
-                return dbc.Alert("No files selected.", color="warning"), no_update
-            
-        except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulDeletionException) as err:
-            return dbc.Alert(str(err), color="danger"), no_update
-    else:
-        raise PreventUpdate
-        
-
 @callback(
     Output('confirmation_edit_multiple_files_modal', 'is_open'),
     [Input('edit_selected_btn', 'n_clicks'), 
@@ -879,7 +1141,8 @@ def toggle_confirmation_modal_edit_selected_files(edit_n_clicks, cancel_n_clicks
 
 
 @callback(
-    Output('action_feedback', 'children', allow_duplicate=True),Output('file-change', 'data', allow_duplicate=True),
+    Output('action_feedback', 'children'), Output('file-change', 'data', allow_duplicate=True),
+    Input('confirm_delete_multiple_files', 'n_clicks'),
     Input('confirm_edit_multiple_files', 'n_clicks'),
     State({'type': 'file_selection', 'index': ALL}, 'value'),
     State("directory_name", 'data'),
@@ -889,32 +1152,49 @@ def toggle_confirmation_modal_edit_selected_files(edit_n_clicks, cancel_n_clicks
     State("check_all_files", "value"),
     prevent_initial_call=True
 )
-def confirm_edit_selected_files(n_clicks, selected_files_values, directory_name, project_name, modality, tags, use_all_files):
-    if ctx.triggered_id == "confirm_edit_multiple_files" and n_clicks > 0:
-        try:
-            directory = get_connection().get_directory(project_name, directory_name)
-            if use_all_files:
-                files = [file['name'] for file in json.loads(directory.get_all_files_sliced_and_as_json())] 
-            elif selected_files_values:
-                files = [file for sublist in selected_files_values for file in sublist]
-            else:
-                raise PreventUpdate
-            
-            if files:
-                directory.update_multiple_files(files, modality, tags)
-                return dbc.Alert(f"Updated {len(files)} file(s).", color="warning"), 1
-            else:
-                return dbc.Alert("No files selected.", color="warning"), no_update
-            
-        except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulDeletionException) as err:
-            return dbc.Alert(str(err), color="danger"), no_update
+# Callback for the confirmed bulk actions (delete or edit) on the selected files
+def confirm_action_selected_files(delete_n_clicks, edit_n_clicks, selected_files_values, directory_name, project_name, modality, tags, use_all_files):
+    if ctx.triggered_id == "confirm_delete_multiple_files" and delete_n_clicks:
+        is_deletion = True
+    elif ctx.triggered_id == "confirm_edit_multiple_files" and edit_n_clicks:
+        is_deletion = False
     else:
         raise PreventUpdate
 
+    if not use_all_files and not selected_files_values:
+        raise PreventUpdate
+
+    try:
+        directory = get_cached_directory(project_name, directory_name)
+        files = get_selected_file_names(directory, selected_files_values, use_all_files)
+        if not files:
+            return dbc.Alert("No files selected.", color="warning"), no_update
+
+        if is_deletion:
+            # File store deletions are issued concurrently
+            directory.delete_multiple_files(files, parallel=True)
+            message = f"Deleted {len(files)} file(s)."
+        else:
+            directory.update_multiple_files(files, modality, tags)
+            message = f"Updated {len(files)} file(s)."
+        invalidate_cached_directory(directory_name)
+        invalidate_files_page_cache(directory_name)
+        return dbc.Alert(message, color="warning"), 1
+
+    except UnsuccessfulDeletionException as err:
+        # Some of the files may have been deleted nevertheless
+        invalidate_cached_directory(directory_name)
+        invalidate_files_page_cache(directory_name)
+        return dbc.Alert(str(err), color="danger"), 1
+    except (FailedConnectionException, UnsuccessfulGetException, UnsuccessfulAttributeUpdateException) as err:
+        return dbc.Alert(str(err), color="danger"), no_update
+
 
 @callback(
-    Output('files_table', 'children', allow_duplicate=True),
+    Output('files_table_body', 'children'),
     Output('pagination_files', 'max_value'),
+    Output('check_all_files', 'value'),
+    Output('files_page_metadata', 'data'),
     Input('file-change', 'data'),
     Input('pagination_files', 'active_page'),
     Input('num_files_per_page_select', 'value'),
@@ -924,23 +1204,63 @@ def confirm_edit_selected_files(n_clicks, selected_files_values, directory_name,
     prevent_initial_call=True)
 # Callback to update file table if files change
 def cb_reload_files_table(files, active_page, quantity, directory, new, filter):
-    pagination_max_value = json.loads(directory)['number_of_files_on_this_level']/int(quantity)
-    if pagination_max_value < 1:
-        pagination_max_value = 1
     try:
         if not active_page:
             active_page = 1
         if not filter:
             filter = ''
-        return get_files_table(directory=directory, filter=filter, active_page=int(active_page), quantity=int(quantity), new=new), pagination_max_value
+        # Only the requested page is fetched from the backend, page count is derived from the number of matching files
+        files, total = get_files_page(directory, filter, int(active_page), int(quantity))
+        pagination_max_value = max(-(-total // int(quantity)), 1)
+        # Only the rows are sent, the header and the consistency warning stay untouched
+        return get_files_table_rows(files, int(active_page), int(quantity), new), pagination_max_value, False, get_files_metadata(files)
     except (FailedConnectionException, UnsuccessfulGetException) as err:
-        return dbc.Alert(str(err), color="danger")
+        return html.Tr(html.Td(dbc.Alert(str(err), color="danger"), colSpan=len(FILES_TABLE_HEADER_CELLS) + 2)), no_update, no_update, no_update
     
     
+@callback(
+    Output('preview_slot', 'children'),
+    Input('show_preview_btn', 'n_clicks'),
+    Input('file-change', 'data'),
+    State('directory_name', 'data'),
+    State('project_name', 'data'),
+    prevent_initial_call=True
+)
+# Callback for the preview of the first file. Only on request, as it fetches and decodes the file from XNAT.
+# Once shown, the preview follows changes to the files.
+def cb_load_preview(n_clicks, file_change, directory_name, project_name):
+    if not n_clicks:
+        raise PreventUpdate
+    try:
+        directory = get_cached_directory(project_name, directory_name)
+        # The files table usually fetched the first (unfiltered) block already, it starts with the first file
+        return get_single_file_preview(directory, peek_files_block(directory_name, '', 0))
+    except (FailedConnectionException, UnsuccessfulGetException) as err:
+        return dbc.Alert(str(err), color="warning")
+    except ValueError:
+        # File content could not be parsed (malformed JSON or CSV), the page is shown without preview
+        return html.Div()
+
+
+# The heartbeat only runs while a download is being prepared, i.e. while the id of an archive job of the
+# selected files is stored (it is cleared once the polling for the archive ended). The directory download
+# is streamed by its own request and needs no heartbeat.
+clientside_callback(
+    """
+    function(job) {
+        return !job;
+    }
+    """,
+    Output('keep_alive_interval_directory', 'disabled'),
+    Input('selected_download_job', 'data'),
+    prevent_initial_call=True
+)
+
+
 @callback(
     Output('keep_alive_output_directory', 'children'),  # Dummy output
-    [Input('keep_alive_output_directory', 'n_intervals')],
-    prevent_initial_callback=True
+    [Input('keep_alive_interval_directory', 'n_intervals')],
+    prevent_initial_call=True
 )
 def keep_session_alive(n):
     try:
@@ -962,187 +1282,214 @@ def layout(project_name: Optional[str] = None, directory_name: Optional[str] = N
     if not current_user.is_authenticated:
         return login_required_interface()
 
-    if project_name and directory_name:
-        try:
-            connection = get_connection()
-            project = connection.get_project(project_name)
-            directory = project.get_directory(directory_name)
-            new_files = directory.get_new_files_for_user(current_user.id)
-            directory.update_user_activity(current_user.id)
-
-        except (FailedConnectionException, UnsuccessfulGetException) as err:
-            return dbc.Alert(str(err), color="danger")
-
-        # Breadcrumbs for nested directories
-        breadcrumb_buffer = None
-        link_to_direct_parent = None
-        extra_span = None
-
-        if directory_name.count('::') > 1:
-            parent = directory.parent_directory.unique_name
-            link_to_direct_parent = dcc.Link(f"{parent.rsplit('::')[-1]}", href=f"/dir/{project_name}/{parent}",
-                                             style={"color": colors['sage'], "marginRight": "1%"})
-            extra_span = html.Span(" > ", style={"marginRight": "1%"})
-            if directory_name.count('::') > 2:
-                breadcrumb_buffer = html.Span(
-                    " ...   \u00A0 >  ", style={"marginRight": "1%"})
-        
-        # Favorite status
-        favorite_status = directory.is_favorite(username=current_user.id)
-        if favorite_status:
-            heart_icon = "bi-heart-fill"
-        else:
-            heart_icon = "bi-heart"
+    if not project_name or not directory_name:
+        return dbc.Alert("No project and directory name was given.", color="danger")
 
-        # Pagination info
-        files_current_active_page = 1 # offset
-        files_items_per_page = 20     # quantity
-        
-        subdir_current_active_page = 1 # offset
-        subdir_items_per_page = 5     # quantity
+    try:
+        connection = get_connection()
+        project = connection.get_project(project_name)
+        directory = project.get_directory(directory_name)
+        # The first subdirectory page is only retrieved if it was not rendered recently
+        subdirectories_page_key = (current_user.id, directory.unique_name, '', 1)
+        subdirectories_page = subdirectories_page_cache.get(subdirectories_page_key)
+        # Everything displayed on this page is retrieved at once (this also records the user's visit)
+        bundle = directory.get_page_bundle(current_user.id, files_quantity=20,
+                                           subdirectories_quantity=0 if subdirectories_page else SUBDIRECTORIES_PER_PAGE)
+        if subdirectories_page is None:
+            subdirectories_page = (get_subdirectories_table(bundle.subdirectories), bundle.number_of_subdirectories)
+            subdirectories_page_cache.set(subdirectories_page_key, subdirectories_page)
+        new_files = bundle.new_files
 
-        # Initial directory data
-        initial_directory_data = json.dumps(directory.to_dict())
-        initial_subdir_data = directory.get_subdirectories(offset=subdir_current_active_page - 1, quantity=subdir_items_per_page)
+    except (FailedConnectionException, UnsuccessfulGetException) as err:
+        return dbc.Alert(str(err), color="danger")
 
-        return html.Div([
-            # dcc Store components for project and directory name strings
-            dcc.Store(id='directory_name', data=directory.unique_name),
-            dcc.Store(id='project_name', data=project_name),
-            dcc.Store(id='directory', data=initial_directory_data),
-            dcc.Store(id='file-change'),
-            dcc.Store(id='new_file_store', data=new_files),
-
-            # Breadcrumbs
-            html.Div(
-                [
-                    dcc.Link(
-                        "Home", href="/", style={"color": colors['sage'], "marginRight": "1%"}),
-                    html.Span(" > ", style={"marginRight": "1%"}),
-                    dcc.Link("All Projects", href="/projects",
-                             style={"color": colors['sage'], "marginRight": "1%"}),
-                    html.Span(" > ", style={"marginRight": "1%"}),
-                    dcc.Link(f"{project_name}", href=f"/project/{project_name}",
-                             style={"color": colors['sage'], "marginRight": "1%"}),
-                    html.Span(" > ", style={"marginRight": "1%"}),
-                    breadcrumb_buffer,
-                    link_to_direct_parent,
-                    extra_span,
-                    html.Span(
-                        f"{directory.display_name}", className='active fw-bold', style={"color": "#707070"})
-                ],
-                className='breadcrumb'
-            ),
+    # Breadcrumbs for nested directories
+    breadcrumb_buffer = None
+    link_to_direct_parent = None
+    extra_span = None
+
+    if directory_name.count('::') > 1:
+        parent = bundle.directory['associated_directory']
+        link_to_direct_parent = dcc.Link(f"{parent.rsplit('::')[-1]}", href=f"/dir/{project_name}/{parent}",
+                                         style={"color": colors['sage'], "marginRight": "1%"})
+        extra_span = html.Span(" > ", style={"marginRight": "1%"})
+        if directory_name.count('::') > 2:
+            breadcrumb_buffer = html.Span(
+                " ...   \u00A0 >  ", style={"marginRight": "1%"})
+    
+    # Favorite status
+    if bundle.is_favorite:
+        heart_icon = "bi-heart-fill"
+    else:
+        heart_icon = "bi-heart"
 
-            # Header + Buttons
-            dbc.Row([
-                    dbc.Col([
-                        html.H1(f"Directory {directory.display_name}", style={
-                                'textAlign': 'left', }),]),
+    # Role of the current user within this project (decides which actions are displayed)
+    user_rights = bundle.user_rights
+
+    # Pagination info
+    files_current_active_page = 1 # offset
+    files_items_per_page = 20     # quantity
+    
+    subdir_current_active_page = 1 # offset
+    subdir_items_per_page = SUBDIRECTORIES_PER_PAGE     # quantity
+
+    # Initial directory data
+    # Stored as dict, dcc.Store serializes it once at the transport boundary
+    initial_directory_data = bundle.directory
+    initial_files = bundle.files
+    initial_subdirectories_table = subdirectories_page[0]
+    number_of_subdirectories = bundle.number_of_subdirectories
+
+    return html.Div([
+        # dcc Store components for project and directory name strings
+        dcc.Store(id='directory_name', data=directory.unique_name),
+        dcc.Store(id='project_name', data=project_name),
+        dcc.Store(id='directory', data=initial_directory_data),
+        dcc.Store(id='file-change'),
+        # Only sent if there actually are new files, the table treats None as 'nothing new'
+        dcc.Store(id='new_file_store', data=new_files or None),
+        dcc.Store(id='files_page_metadata', data=get_files_metadata(initial_files)),
+        dcc.Store(id='is_favorite', data=bundle.is_favorite),
+        # Background download of selected files and the interval polling for its archive
+        dcc.Store(id='selected_download_job'),
+        dcc.Interval(id='selected_download_poll', interval=1000, disabled=True),
+
+        # Breadcrumbs
+        html.Div(
+            [
+                dcc.Link(
+                    "Home", href="/", style={"color": colors['sage'], "marginRight": "1%"}),
+                html.Span(" > ", style={"marginRight": "1%"}),
+                dcc.Link("All Projects", href="/projects",
+                         style={"color": colors['sage'], "marginRight": "1%"}),
+                html.Span(" > ", style={"marginRight": "1%"}),
+                dcc.Link(f"{project_name}", href=f"/project/{project_name}",
+                         style={"color": colors['sage'], "marginRight": "1%"}),
+                html.Span(" > ", style={"marginRight": "1%"}),
+                breadcrumb_buffer,
+                link_to_direct_parent,
+                extra_span,
+                html.Span(
+                    f"{directory.display_name}", className='active fw-bold', style={"color": "#707070"})
+            ],
+            className='breadcrumb'
+        ),
+
+        # Header + Buttons
+        dbc.Row([
+                dbc.Col([
+                    html.H1(f"Directory {directory.display_name}", style={
+                            'textAlign': 'left', }),]),
+                dbc.Col(
+                    [
+                        html.Div([
+                            # Button to access the File Viewer (viewer.py)
+                            dbc.Button([html.I(className="bi bi-play me-2"),
+                                        "Viewer"], color="success", size="md",
+                                       href=f"/viewer/{project_name}/{directory.unique_name}/none"),
+                            dbc.Button([html.I(className=f"bi {heart_icon}")], 
+                                        id="btn_fav_dir",  n_clicks=0,size="md", outline=True, style={'color': colors['favorite'], 'border-color':colors['favorite']}, title="Add to Favorites",class_name="mx-2"),
+                            # Download Directory button, the browser downloads the streamed archive directly
+                            dbc.Button([html.I(className="bi bi-download me-2"),
+                                        "Download"], id="btn_download_dir", size="md", class_name="me-2", outline=True, color="success",
+                                       href=f"/download/dir/{quote(project_name)}/{quote(directory.unique_name)}", external_link=True),
+                            ])
+                    ], className="d-grid gap-2 d-md-flex justify-content-md-end"),
+                ], className="mb-3"),
+        # Directory Details
+        dbc.Card([
+            dbc.CardHeader(
+                children=[
+                    html.H4("Details"), 
+                    modal_edit_directory(directory, rights=user_rights)],
+                className="d-flex justify-content-between align-items-center"),
+            dcc.Loading(dbc.CardBody(get_details(initial_directory_data), id="dir_details_card"), color=colors['sage'])], class_name="custom-card mb-3"),
+        # Sub-Directories Table
+        dbc.Card([
+            dbc.CardHeader(children=[html.H4('Directories'),
+                                     modal_create_new_subdirectory(rights=user_rights)],
+                           className="d-flex justify-content-between align-items-center"),
+            dbc.CardBody([
+                # Filter file tags
+                dbc.Row([
+                    dbc.Col(dbc.Input(id="filter_subdirectory_tags",
+                        placeholder="Search subdirectories...")),
+                    dbc.Col(dbc.Button(
+                        "Filter", id="filter_subdirectory_tags_btn", outline=True, color="success")),
+                ], class_name="mb-3"),
+                # Directories Table
+                dcc.Loading(html.Div(initial_subdirectories_table, id='subdirectory_table'), color=colors['sage']),
+                 dbc.Pagination(id="pagination_subdirs", max_value=max(-(
+                            -number_of_subdirectories // subdir_items_per_page), 1), first_last=True, previous_next=True, active_page=subdir_current_active_page, fully_expanded=False,),
+            ])], class_name="custom-card mb-3"),
+
+        # Files Table
+        dbc.Card([
+            dbc.CardHeader(html.H4('Files')),
+            dbc.CardBody([
+                # Filter file tags
+                dbc.Row(html.Div(id="action_feedback"),),
+                dbc.Row([
+                    dbc.Col(dbc.Input(id="filter_file_tags",
+                        placeholder="Search file tags.. (e.g. 'CT')")),
+                    dbc.Col(dbc.Button(
+                        "Filter", id="filter_file_tags_btn", outline=True, color="success")),
                     dbc.Col(
-                        [
-                            html.Div([
-                                # Button to access the File Viewer (viewer.py)
-                                dbc.Button([html.I(className="bi bi-play me-2"),
-                                            "Viewer"], color="success", size="md",
-                                           href=f"/viewer/{project_name}/{directory.unique_name}/none"),
-                                dbc.Button([html.I(className=f"bi {heart_icon}")], 
-                                            id="btn_fav_dir",  n_clicks=0,size="md", outline=True, style={'color': colors['favorite'], 'border-color':colors['favorite']}, title="Add to Favorites",class_name="mx-2"),
-                                # Download Directory button
-                                dbc.Button([html.I(className="bi bi-download me-2"),
-                                            "Download", dcc.Loading(dcc.Download(id="download_directory"), color=colors['sage'])], id="btn_download_dir", size="md", class_name="me-2", n_clicks=0, outline=True, color="success"),
-                                ])
-                        ], className="d-grid gap-2 d-md-flex justify-content-md-end"),
-                    ], className="mb-3"),
-            # Directory Details
-            dbc.Card([
-                dbc.CardHeader(
-                    children=[
-                        html.H4("Details"), 
-                        modal_edit_directory(project, directory)],
-                    className="d-flex justify-content-between align-items-center"),
-                dcc.Loading(dbc.CardBody(get_details(initial_directory_data), id="dir_details_card"), color=colors['sage'])], class_name="custom-card mb-3"),
-            # Sub-Directories Table
-            dbc.Card([
-                dbc.CardHeader(children=[html.H4('Directories'),
-                                         modal_create_new_subdirectory(directory)],
-                               className="d-flex justify-content-between align-items-center"),
-                dbc.CardBody([
-                    # Filter file tags
-                    dbc.Row([
-                        dbc.Col(dbc.Input(id="filter_subdirectory_tags",
-                            placeholder="Search subdirectories...")),
-                        dbc.Col(dbc.Button(
-                            "Filter", id="filter_subdirectory_tags_btn", outline=True, color="success")),
-                    ], class_name="mb-3"),
-                    # Directories Table
-                    dcc.Loading(html.Div(get_subdirectories_table(
-                        initial_subdir_data), id='subdirectory_table'), color=colors['sage']),
-                     dbc.Pagination(id="pagination_subdirs", max_value=math.ceil(
-                                int(directory.number_of_subdirectories)/subdir_items_per_page), first_last=True, previous_next=True, active_page=subdir_current_active_page, fully_expanded=False,),
-                ])], class_name="custom-card mb-3"),
-
-            # Files Table
-            dbc.Card([
-                dbc.CardHeader(html.H4('Files')),
-                dbc.CardBody([
-                    # Filter file tags
-                    dbc.Row(html.Div(id="action_feedback"),),
-                    dbc.Row([
-                        dbc.Col(dbc.Input(id="filter_file_tags",
-                            placeholder="Search file tags.. (e.g. 'CT')")),
-                        dbc.Col(dbc.Button(
-                            "Filter", id="filter_file_tags_btn", outline=True, color="success")),
-                        dbc.Col(
-                            # dcc download components for downloading directories and files
-                            ),
-                        dbc.Col([html.Div([
-                            modal_edit_selected_files(rights=project.your_user_role),
-                            dbc.Button([html.I(className="bi bi-download"), dcc.Loading(dcc.Download(id="download_directory_single"), color=colors['sage'])], class_name="me-1",outline=True, color="success",title="Download Selected", id="download_selected_btn"),
-                            modal_delete_selected_files(rights=project.your_user_role)
-                        ], className="d-flex justify-content-end")]),
-
-                    ], class_name="mb-3"),
-
-
-                    # Display a table of the directory's files
-                    dcc.Loading(html.Div(get_files_table(
-                        directory=initial_directory_data, quantity=files_items_per_page, new=new_files), id='files_table'), color=colors['sage']),
-                    dbc.Row([
-                        dbc.Col([
-                            dbc.Pagination(id="pagination_files", max_value=math.ceil(
-                                int(directory.number_of_files_on_this_level)/files_items_per_page), first_last=True, previous_next=True, active_page=files_current_active_page, fully_expanded=False,),
-                        ]),
-                        dbc.Col([
-                            html.Div(
-                                dbc.Select(
-                                    id="num_files_per_page_select",
-                                    options=[
-                                        {"label": "10", "value": 10},
-                                        {"label": "20", "value": 20},
-                                        {"label": "50", "value": 50},
-                                        {"label": "100", "value": 100},
-                                        {"label": "200", "value": 200},
-                                    ],
-                                    value=20,  # Default value
-                                    style={"width":"auto"},
-                                ),
-                            )
-                        ], class_name="d-inline-flex justify-content-end"), 
+                        # dcc download components for downloading directories and files
+                        ),
+                    dbc.Col([html.Div([
+                        modal_edit_selected_files(rights=user_rights),
+                        dbc.Button([html.I(className="bi bi-download"), dcc.Loading(dcc.Download(id="download_directory_single"), color=colors['sage'])], class_name="me-1",outline=True, color="success",title="Download Selected", id="download_selected_btn"),
+                        modal_delete_selected_files(rights=user_rights)
+                    ], className="d-flex justify-content-end")]),
+
+                ], class_name="mb-3"),
+                # Modals shared by the edit/delete buttons of all file rows
+                modal_edit_file(rights=user_rights),
+                modal_delete_file(rights=user_rights),
+
+
+                # Warning is a sibling of the table so it is not re-rendered on page changes
+                html.Div(get_files_warning(directory), id='files_warning'),
+                # Display a table of the directory's files
+                dcc.Loading(html.Div(get_files_table(
+                    initial_files, quantity=files_items_per_page, new=new_files or None), id='files_table'), color=colors['sage']),
+                dbc.Row([
+                    dbc.Col([
+                        dbc.Pagination(id="pagination_files", max_value=max(-(
+                            -int(bundle.directory['number_of_files_on_this_level']) // files_items_per_page), 1), first_last=True, previous_next=True, active_page=files_current_active_page, fully_expanded=False,),
                     ]),
-                ])], class_name="custom-card mb-3"),
-
-            # Display a preview of the first file's content
-            # get_single_file_preview(directory),
-            dbc.Row(html.Div([
-                modal_delete(directory)], style={'float': 'right'}, className="mt-3 mb-5 d-grid gap-2 d-md-flex justify-content-md-end")),
-            dcc.Interval(
-                    id='keep_alive_interval_directory',
-                    interval=2*60*1000,  # in milliseconds, 2 minutes * 60 seconds * 1000 ms
-                    n_intervals=0
-                ),
-                html.Div(id='keep_alive_output_directory'),
-        ])
+                    dbc.Col([
+                        html.Div(
+                            dbc.Select(
+                                id="num_files_per_page_select",
+                                options=[
+                                    {"label": "10", "value": 10},
+                                    {"label": "20", "value": 20},
+                                    {"label": "50", "value": 50},
+                                    {"label": "100", "value": 100},
+                                    {"label": "200", "value": 200},
+                                ],
+                                value=20,  # Default value
+                                style={"width":"auto"},
+                            ),
+                        )
+                    ], class_name="d-inline-flex justify-content-end"), 
+                ]),
+            ])], class_name="custom-card mb-3"),
+
+        # Preview of the first file's content, only loaded when the user asks for it
+        dbc.Button([html.I(className="bi bi-eye me-2"), "Preview first file"], id="show_preview_btn",
+                   outline=True, color="success", class_name="mb-3"),
+        dcc.Loading(html.Div(id='preview_slot'), color=colors['sage']),
+        dbc.Row(html.Div([
+            modal_delete(directory, rights=user_rights)], style={'float': 'right'}, className="mt-3 mb-5 d-grid gap-2 d-md-flex justify-content-md-end")),
+        dcc.Interval(
+                id='keep_alive_interval_directory',
+                interval=2*60*1000,  # in milliseconds, 2 minutes * 60 seconds * 1000 ms
+                n_intervals=0,
+                disabled=True  # Only enabled while a download is being prepared
+            ),
+            html.Div(id='keep_alive_output_directory'),
+    ])
 
-    else:
-        return dbc.Alert("No project and directory name was given.", color="danger")
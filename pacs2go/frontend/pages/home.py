@@ -1,38 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import dash_bootstrap_components as dbc
 from dash import dcc, html, register_page
+from flask import copy_current_request_context
 from flask_login import current_user
 
 from pacs2go.data_interface.exceptions.exceptions import (
     FailedConnectionException, UnsuccessfulGetException)
-from pacs2go.frontend.helpers import (colors, get_connection,
-                                      login_required_interface)
+from pacs2go.frontend.helpers import (colors, get_accessible_project_names,
+                                      get_favorites, login_required_interface)
 
 register_page(__name__, title='PACS2go 2.0', path='/')
 
+# The project and the favorites card are retrieved concurrently, both mostly wait for XNAT
+cards_executor = ThreadPoolExecutor(max_workers=8)
+
+# Shared by all links of the project and favorite lists
+LINK_STYLE = {'color': colors['links']}
+# Icons are shared by all list items and cards instead of being created per item
+UPLOAD_ICON = html.I(className="bi bi-cloud-upload me-2")
+HEART_ICON = html.I(className="bi bi-heart-fill", style={'color': colors['favorite']})
+
+# Static cards, built once at import time
+UPLOAD_CARD = dbc.Card(
+    dbc.CardBody(
+        [
+            html.H4("Upload", className="card-title"),
+            html.P("Upload Medical Files. PACS2go supports a broad array of file formats including DICOM, NIFTI, JPEG, PNG, TIFF, CSV, JSON and many more.",
+                   className="card-subtitle"),
+            dbc.Button([UPLOAD_ICON, " Upload to PACS2go"],
+                       href=f"/upload/none", class_name="mt-3", outline=False, color='success'),
+        ]
+    ), className="custom-card mb-3")
+
+NO_FAVORITES_CARD = dbc.Card(
+    dbc.CardBody(
+        [
+            html.H4("Your favorite directories", className="card-title"),
+            html.P(f"You have not favorited any directories or subdirectories yet. To do so, navigate to a directory and press the heart in the top right hand corner. This allows for faster access.",
+                   className="card-subtitle"),
+        ]
+    ), className="custom-card")
+
 
 def card_view_projects():
-    connection = get_connection()
     try:
-        projects = connection.get_all_projects(only_accessible=True)
-        number_of_projects = len(projects)
+        # Cached for a short while, repeated visits of the landing page do not query XNAT again
+        project_names = get_accessible_project_names()
+        number_of_projects = len(project_names)
 
     except (FailedConnectionException, UnsuccessfulGetException) as err:
         return dbc.Alert(str(err))
 
-    project_list = []
-    
     # Only show 8 projects on landing page
     limit = 8
-    i = 0
-    for p in projects:
-        project_list.append(dbc.ListGroupItem([dcc.Link(
-            p.name, href=f"/project/{p.name}", className="text-decoration-none", style={'color': colors['links']}),
-            dcc.Link(html.I(className="bi bi-cloud-upload me-2"), href=f"/upload/{p.name}",
-                    style={'color': colors['links']})], class_name="d-flex justify-content-between"))
-        i = i+1
-
-        if i == limit:
-            break
+    project_list = [dbc.ListGroupItem([
+        dcc.Link(name, href=f"/project/{name}", className="text-decoration-none", style=LINK_STYLE),
+        dcc.Link(UPLOAD_ICON, href=f"/upload/{name}", style=LINK_STYLE)],
+        class_name="d-flex justify-content-between") for name in project_names[:limit]]
 
     card = dbc.Card(
         dbc.CardBody(
@@ -52,56 +77,34 @@ def card_view_projects():
 
 
 def card_view_favorites():
-    connection = get_connection()
     try:
-        favs = connection.get_favorites(current_user.id)
+        favs = get_favorites()
 
     except (FailedConnectionException, UnsuccessfulGetException) as err:
         return dbc.Alert(str(err))
 
-    fav_list = []
-    for index, d in enumerate(favs):
-        fav_list.append(dbc.ListGroupItem([dcc.Link(
-            f"{d.project.name} /../ {d.display_name}", href=f"/dir/{d.project.name}/{d.unique_name}", className="text-decoration-none", style={'color': colors['links']}),
-            ], 
-                class_name="d-flex justify-content-between"))
+    fav_list = [dbc.ListGroupItem([
+        dcc.Link(f"{project_name} /../ {display_name}", href=f"/dir/{project_name}/{unique_name}", className="text-decoration-none", style=LINK_STYLE)],
+        class_name="d-flex justify-content-between") for project_name, display_name, unique_name in favs]
 
     if len(favs) > 0:
         card = dbc.Card(
             dbc.CardBody(
                 [
-                    html.H4(["Your favorite directories  ", html.I(className=f"bi bi-heart-fill", style={'color': colors['favorite']},)], className="card-title"),
+                    html.H4(["Your favorite directories  ", HEART_ICON], className="card-title"),
                     dbc.ListGroup(fav_list,
                                 class_name="my-3"
                                 ),
                 ]
             ), className="custom-card")
     else:
-        card = dbc.Card(
-            dbc.CardBody(
-                [
-                    html.H4("Your favorite directories", className="card-title"),
-                    html.P(f"You have not favorited any directories or subdirectories yet. To do so, navigate to a directory and press the heart in the top right hand corner. This allows for faster access.",
-                       className="card-subtitle"),
-                ]
-            ), className="custom-card")
+        card = NO_FAVORITES_CARD
 
     return card
 
 
 def card_view_upload():
-    card = dbc.Card(
-        dbc.CardBody(
-            [
-                html.H4("Upload", className="card-title"),
-                html.P("Upload Medical Files. PACS2go supports a broad array of file formats including DICOM, NIFTI, JPEG, PNG, TIFF, CSV, JSON and many more.",
-                       className="card-subtitle"),
-                dbc.Button([html.I(className="bi bi-cloud-upload me-2"), " Upload to PACS2go"],
-                           href=f"/upload/none", class_name="mt-3", outline=False, color='success'),
-            ]
-        ), className="custom-card mb-3")
-
-    return card
+    return UPLOAD_CARD
 
 
 #################
@@ -113,11 +116,14 @@ def layout():
         return login_required_interface()
 
     else:
+        # The worker threads need the request context for the current user and their session
+        projects_card = cards_executor.submit(copy_current_request_context(card_view_projects))
+        favorites_card = cards_executor.submit(copy_current_request_context(card_view_favorites))
         return [
             html.H1(f'Welcome to PACS2go, {current_user.id}!'),
             html.Div('Exchange medical files.'),
             dbc.Row([
-                dbc.Col(card_view_projects(),),
-                dbc.Col([card_view_upload(), card_view_favorites()]),
+                dbc.Col(projects_card.result(),),
+                dbc.Col([card_view_upload(), favorites_card.result()]),
             ], class_name="my-3")
         ]
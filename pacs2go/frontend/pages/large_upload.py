@@ -1,41 +1,59 @@
+import os
 import shutil
 import tempfile
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
 import dash_bootstrap_components as dbc
 import dash_uploader as du  # https://github.com/np-8/dash-uploader
 from dash import callback, ctx, dcc, get_app, html, no_update, register_page
 from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
 from flask_login import current_user
 
 from pacs2go.data_interface.exceptions.exceptions import (
-    FailedConnectionException, UnsuccessfulCreationException, UnsuccessfulGetException,
-    UnsuccessfulUploadException, WrongUploadFormatException)
+    FailedConnectionException, UnsuccessfulGetException)
 from pacs2go.data_interface.pacs_data_interface import Project
-from pacs2go.frontend.helpers import (colors, get_connection,
-                                      login_required_interface)
+from pacs2go.frontend.helpers import (LockedCache, colors, get_connection,
+                                      get_job_path, get_job_status,
+                                      get_project_roles,
+                                      get_uploadable_project_names,
+                                      invalidate_project_directory_caches,
+                                      login_required_interface, submit_job,
+                                      sweep_spool_dir)
 
 register_page(__name__, title='Upload - PACS2go',
               path_template='/upload/<project_name>')
 
 # Setup dash-uploader
-dirpath = tempfile.mkdtemp()
-UPLOAD_FOLDER_ROOT = dirpath # still stateless because du uses upload id's -> multiuser friendly
+# Fixed location shared by all worker processes, the chunks of one upload may be received by different workers.
+# Every upload is written to its own sub folder named after its upload id -> multiuser friendly
+UPLOAD_FOLDER_ROOT = os.getenv("UPLOAD_FOLDER_ROOT", os.path.join(tempfile.gettempdir(), 'pacs2go_uploads'))
+os.makedirs(UPLOAD_FOLDER_ROOT, exist_ok=True)
 du.configure_upload(get_app(), UPLOAD_FOLDER_ROOT)
 
+# Inserting an upload into XNAT may take minutes, it runs as a background job so the worker thread is free again.
+# Its outcome is spooled to a directory shared by all worker processes (see the background job helpers).
+# Outcomes that were never picked up are removed after UPLOAD_JOBS_MAX_AGE seconds, the polling gives up
+# if a job showed no sign of life for UPLOAD_JOB_TIMEOUT seconds (e.g. its worker process was restarted).
+UPLOAD_JOBS_DIR = os.getenv("UPLOAD_JOBS_DIR", os.path.join(tempfile.gettempdir(), 'pacs2go_upload_jobs'))
+os.makedirs(UPLOAD_JOBS_DIR, exist_ok=True)
+UPLOAD_JOBS_MAX_AGE = int(os.getenv("UPLOAD_JOBS_MAX_AGE", 24 * 60 * 60))
+UPLOAD_JOB_TIMEOUT = int(os.getenv("UPLOAD_JOB_TIMEOUT", 5 * 60))
+upload_jobs_executor = ThreadPoolExecutor(max_workers=int(os.getenv("UPLOAD_JOBS", 2 * (os.cpu_count() or 1))))
+
+# Short lived cache for the directory dropdown options, keyed by (user, project). Switching back and forth
+# between projects or reloading the page does not query the directories again.
+directory_options_cache = LockedCache(maxsize=128, ttl=10)
+
 
 def get_project_names() -> List[str]:
     # Get List of all project names as html Options
     try:
-        connection = get_connection()
-        project_list = []
-
-        for p in connection.get_all_projects():
-            if p.your_user_role in ['Owners', 'Members']:
-                project_list.append(p.name)
-
-        return project_list
+        # Projects the user may upload to, cached for a short while together with the landing page's project list
+        return get_uploadable_project_names()
 
     except (FailedConnectionException, UnsuccessfulGetException) as err:
         return ["No database connection."]
@@ -43,19 +61,30 @@ def get_project_names() -> List[str]:
 
 def get_directory_names(project: Project) -> List[str]:
     # Get List of all project names as html Options
+    key = (current_user.id, project)
+    dir_list = directory_options_cache.get(key)
+    if dir_list is not None:
+        return dir_list
+
     try:
         directories = get_connection().get_project(project).get_all_directory_names_including_subdirectories()
         dir_list = []
 
         for d in directories:
             dir_list.append({'label': d.replace('::', ' / '), 'value':d})
-            
+
+        directory_options_cache.set(key, dir_list)
         return dir_list
 
     except (FailedConnectionException, UnsuccessfulGetException) as err:
         return ["No database connection."]
 
 
+def invalidate_directory_names(project: str):
+    # An upload may have created new directories in the project
+    directory_options_cache.pop((current_user.id, project))
+
+
 def get_upload_component(id: str):
     # dash-uploader Upload component
     return du.Upload(
@@ -66,19 +95,87 @@ def get_upload_component(id: str):
                    'csv', 'gz', 'pdf', 'json',
                    'md', 'py', 'ipynb', 'gif',
                    'svg'],
-        upload_id=uuid.uuid1(),  # Unique session id
-        text='Drag and Drop your file right here! Or click here to select a file!',
+        upload_id=uuid.uuid4(),  # Unique session id (random, no MAC address or clock lookup)
+        # Multiple files per upload are experimental in dash-uploader 0.6 (the upload is reported as completed
+        # after its first file), several files are uploaded as one zip instead
+        max_files=1,
+        text='Drag and Drop your file right here! Or click here to select a file! Please zip multiple files.',
         text_completed='Ready for XNAT Upload: ',
     )
 
 
+# Static parts of the upload form, built once at import time
+UPLOAD_STEP_1_HEADER = dbc.Row(html.H5([html.B("1. Specify the project's name and metadata")]))
+
+UPLOAD_DIRECTORY_COLUMN = dbc.Col(
+    [dbc.Label(html.B("Directory"),),
+     dcc.Dropdown(options=[], id="directory_name", placeholder="Directory Name... (optional)",
+                  value=None),
+     dbc.FormText("Select a directory from the dropdown. For single file uploads, a new directory with the current timestamp will be created if none is selected.")], className="mb-3")
+
+UPLOAD_METADATA_ROWS = [
+    dbc.Row(dbc.Col(
+            [dbc.Label([html.B("Tags")," - If you wish, you may add tags that describe your files' contents. Please separate each tag by comma."]),
+            dbc.Input(id="upload_file_tags",
+                    placeholder="File tags like \'Control group, Dermatology,...\' (optional)"),
+            dbc.FormText("Tags will be added to every file.")], className="mb-3")),
+    dbc.Row(dbc.Col(
+            [dbc.Label([html.B("Modality")," - In case that the modality is consistent for all files."]),
+            dbc.Input(id="upload_file_modality",
+                    placeholder="CT, MRI,... (optional)"),
+            dbc.FormText("Modality will be added to every file.")], className="mb-3")),
+    dbc.Row(dbc.Col(
+            [dbc.Label([html.B("Unpacking a zip file")," - "]),
+             dbc.Checklist(
+                options=[
+                    {"label": "Unpack zip file directly to chosen directory", "value": 1},
+                ],
+                value= [],
+                id="upload_file_unpack_zip",
+                switch=True,
+            ),
+            dbc.FormText("If not activated, a new directory will be created for the top level folder of the zip aka the actual zipped folder inside the chosen directory. \
+                         For each sub-folder inside this folder a directory will be created either way. Choosing a directory is mandatory for this option, else this option is ignored.")], className="mb-3")),
+]
+
+UPLOAD_STEP_2_HEADER = dbc.Row(html.H5([html.B("2. Please select a zip folder or a single file to upload."), html.Br(),
+                                        'Accepted formats include DICOM, NIFTI, JPEG, PNG, TIFF, CSV, TXT, JSON and many more.', html.Br(), html.Br(), 'Please make sure that all files have a valid file extension.']))
+
+UPLOAD_STEP_3_CARD = dbc.Card(dbc.CardBody([
+        html.Div([
+        html.H5([html.B("3. Finish Upload and Assemble Metadata")]),
+        dbc.Button("Complete Upload Process", id="click-upload",
+                size="lg", color="success", disabled=True),
+        # Placeholder for successful upload message + Spinner to symbolize loading
+        dcc.Loading(html.Div(id='output-uploader', className="mt-3"), color=colors['sage'], className="pb-5")])]
+    ), className="custom-card mb-3")
+
+
+UPLOAD_PAGE_HEADER = [
+    # Breadcrumbs
+    html.Div(
+    [
+        dcc.Link("Home", href="/", style={"color": colors['sage'], "marginRight": "1%"}),
+        html.Span(" > ", style={"marginRight": "1%"}),
+        html.Span("Upload", className='active fw-bold',style={"color": "#707070"})],
+        className='breadcrumb'),
+
+    html.H1(
+    children='PACS2go - Uploader',
+    style={
+        'textAlign': 'left',
+    },
+    className="mb-3"),
+]
+
+
 def uploader(passed_project: Optional[str]):
     # If user navigates directly to upload, project name input field will be empty
     if passed_project == 'none':
         passed_project = ''
-    # Upload drag and drop area
+    # Upload drag and drop area, only the project dropdown and the upload component differ between page loads
     return html.Div([
-        dbc.Card(dbc.CardBody([       dbc.Row(html.H5([html.B("1. Specify the project's name and metadata")])),
+        dbc.Card(dbc.CardBody([UPLOAD_STEP_1_HEADER,
             dbc.Row([
                 dbc.Col(
                     # Input field value equals project name, if user navigates to upload via a specific project
@@ -86,39 +183,13 @@ def uploader(passed_project: Optional[str]):
                     dcc.Dropdown(options=get_project_names(),id="project_name", placeholder="Project Name...",
                             value=passed_project),
                     dbc.FormText(["Please choose a project. To create a new project go to", dcc.Link(' projects', href='/projects',style={"color":colors['sage']}), "."])], className="mb-3"),
-                dbc.Col(
-                    [dbc.Label(html.B("Directory"),),
-                    dcc.Dropdown(options=[],id="directory_name", placeholder="Directory Name... (optional)",
-                            value=None),
-                    dbc.FormText("Select a directory from the dropdown. For single file uploads, a new directory with the current timestamp will be created if none is selected.")], className="mb-3")
+                UPLOAD_DIRECTORY_COLUMN,
             ]),
-            dbc.Row(dbc.Col(
-                    [dbc.Label([html.B("Tags")," - If you wish, you may add tags that describe your files' contents. Please separate each tag by comma."]),
-                    dbc.Input(id="upload_file_tags",
-                            placeholder="File tags like \'Control group, Dermatology,...\' (optional)"),
-                    dbc.FormText("Tags will be added to every file.")], className="mb-3")),
-            dbc.Row(dbc.Col(
-                    [dbc.Label([html.B("Modality")," - In case that the modality is consistent for all files."]),
-                    dbc.Input(id="upload_file_modality",
-                            placeholder="CT, MRI,... (optional)"),
-                    dbc.FormText("Modality will be added to every file.")], className="mb-3")),
-            dbc.Row(dbc.Col(
-                    [dbc.Label([html.B("Unpacking a zip file")," - "]),
-                     dbc.Checklist(
-                        options=[
-                            {"label": "Unpack zip file directly to chosen directory", "value": 1},
-                        ],
-                        value= [],
-                        id="upload_file_unpack_zip",
-                        switch=True,
-                    ),
-                    dbc.FormText("If not activated, a new directory will be created for the top level folder of the zip aka the actual zipped folder inside the chosen directory. \
-                                 For each sub-folder inside this folder a directory will be created either way. Choosing a directory is mandatory for this option, else this option is ignored.")], className="mb-3")),
+            *UPLOAD_METADATA_ROWS,
             ]), className="custom-card mb-3"),
 
         dbc.Card(dbc.CardBody([
-            dbc.Row(html.H5([html.B("2. Please select a zip folder or a single file to upload."), html.Br(),
-                         'Accepted formats include DICOM, NIFTI, JPEG, PNG, TIFF, CSV, TXT, JSON and many more.', html.Br(), html.Br(), 'Please make sure that all files have a valid file extension.'])),
+            UPLOAD_STEP_2_HEADER,
             dbc.Row(
                 [
                     get_upload_component(id='dash-uploader'),
@@ -126,14 +197,7 @@ def uploader(passed_project: Optional[str]):
         ],), className="custom-card mb-3"),
         # Placeholder for 'Upload to XNAT' button
         html.Div(id='du-callback-output'),
-        dbc.Card(dbc.CardBody([
-                html.Div([
-                html.H5([html.B("3. Finish Upload and Assemble Metadata")]),
-                dbc.Button("Complete Upload Process", id="click-upload",
-                        size="lg", color="success", disabled=True),
-                # Placeholder for successful upload message + Spinner to symbolize loading
-                dcc.Loading(html.Div(id='output-uploader', className="mt-3"), color=colors['sage'], className="pb-5")])]
-        ), className="custom-card mb-3")
+        UPLOAD_STEP_3_CARD,
     ])
 
 
@@ -149,14 +213,83 @@ def uploader(passed_project: Optional[str]):
     id='dash-uploader',
 )
 def pass_filename_and_show_upload_button(filenames: List[str]):
-    # Get file -> only one file should be in this list bc 'dirpath' is removed after each upload
-    filename = filenames[0]
-    return False, filename
+    # Get file -> only one file should be in this list bc the upload's folder is removed after each upload.
+    # The browser only gets the upload id and the file name, the path is built on the server (see get_uploaded_file_path).
+    filename = os.path.abspath(filenames[0])
+    return False, {'upload_id': os.path.basename(os.path.dirname(filename)), 'file_name': os.path.basename(filename)}
+
+
+def get_uploaded_file_path(upload: dict) -> str:
+    # The store's content is controlled by the browser -> only files inside an upload's own folder are accepted.
+    # Raises ValueError for anything else.
+    try:
+        upload_id = str(uuid.UUID(upload['upload_id']))
+        file_name = upload['file_name']
+    except (KeyError, TypeError, ValueError, AttributeError):
+        raise ValueError("Invalid upload, please upload the file again.")
+
+    upload_folder = os.path.realpath(os.path.join(UPLOAD_FOLDER_ROOT, upload_id))
+    filename = os.path.realpath(os.path.join(upload_folder, str(file_name)))
+    if file_name != os.path.basename(file_name) or os.path.dirname(filename) != upload_folder:
+        raise ValueError("Invalid upload, please upload the file again.")
+    return filename
+
+
+def get_upload_job_path(job_id: str) -> str:
+    # Outcomes live in the upload jobs spool directory, see the background job helpers
+    return get_job_path(UPLOAD_JOBS_DIR, job_id)
+
+
+def advise_sequential_read(filename: str):
+    # The upload is read back from disk once, front to back. Let the kernel read ahead while the
+    # XNAT requests are being prepared (the advice values are not flags, hence two calls).
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(filename, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        # Only a hint, the upload works without it
+        pass
+
+
+def insert_upload(result_path: str, project: Project, filename: str, dir_name: str, tags: str, modality: str, unpack: bool):
+    # Background job (see run_job): inserts the upload into the project.
+    # The result is the unique name of the directory the upload ended up in.
+    if not os.path.exists(filename):
+        raise FileNotFoundError("The uploaded file is no longer available, please upload it again.")
+
+    advise_sequential_read(filename)
+    if dir_name:
+        new_location = project.insert(filename, dir_name, tags, modality, unpack)
+    else:
+        # If the user entered no diretory name
+        new_location = project.insert(file_path=filename, tags_string=tags, modality=modality, unpack_directly=unpack)
+
+    if filename.endswith('.zip'):
+        location = new_location.unique_name
+    else:
+        location = new_location.directory.unique_name
+
+    # Remove this upload's folder after successful upload to XNAT, other users' uploads stay untouched
+    # (the path was checked by get_uploaded_file_path)
+    shutil.rmtree(os.path.dirname(filename), ignore_errors=True)
+
+    with open(result_path, 'w') as f:
+        f.write(location)
+
 
 # Called when step 3 button (appears after dash-uploader received an upload) is clicked
-# and triggers the file upload to XNAT.
+# and starts the file upload to XNAT as a background job.
 @callback(
     Output('output-uploader', 'children'),
+    Output('upload_job', 'data'),
+    Output('upload_poll', 'disabled'),
+    Output('click-upload', 'disabled', allow_duplicate=True),
     Input('click-upload', 'n_clicks'),
     State('project_name', 'value'),
     State('directory_name', 'value'),
@@ -166,7 +299,7 @@ def pass_filename_and_show_upload_button(filenames: List[str]):
     State('upload_file_unpack_zip', 'value'),
     prevent_initial_call=True
 )
-def upload_tempfile_to_xnat(btn: int, project_name: str, dir_name: str, filename: str, tags: str, modality: str, unpack:int):
+def upload_tempfile_to_xnat(btn: int, project_name: str, dir_name: str, upload: dict, tags: str, modality: str, unpack:int):
     if ctx.triggered_id == "click-upload":
         if project_name:
             # Project name shall not contain whitespaces
@@ -178,40 +311,76 @@ def upload_tempfile_to_xnat(btn: int, project_name: str, dir_name: str, filename
                 unpack = True
 
             try:
-                connection = get_connection()
-                project = connection.get_project(project_name)
-                if project.your_user_role == 'Collaborators':
-                    return dbc.Alert("Upload not possible! Your user role in the project '" + project.name + "' does not allow you to upload files.", color="danger")
-
-                tags = tags if tags else ''
-                modality = modality if modality else '-'
-                if dir_name:
-                    new_location = project.insert(filename, dir_name, tags, modality, unpack)
-                else:
-                    # If the user entered no diretory name
-                    new_location = project.insert(file_path=filename, tags_string=tags, modality=modality, unpack_directly=unpack)
-
-                if filename.endswith('.zip'):
-                    dir_name = new_location.unique_name
-                else:
-                    dir_name = new_location.directory.unique_name
-
-                # Remove tempdir after successful upload to XNAT
-                shutil.rmtree(dirpath)
-                return dbc.Alert(["The upload was successful! ",
-                                  dcc.Link(f"Click here to go to the directory {dir_name.rsplit('::', 1)[-1]}.",
-                                           href=f"/dir/{project_name}/{dir_name}",
-                                           className="fw-bold text-decoration-none",
-                                           style={'color': colors['links']})], color="success")
-
-            except (FailedConnectionException, UnsuccessfulGetException, WrongUploadFormatException, UnsuccessfulUploadException, Exception) as err:
-                return dbc.Alert(str(err), color="danger")
+                filename = get_uploaded_file_path(upload)
+            except ValueError as err:
+                return dbc.Alert(str(err), color="danger"), no_update, no_update, no_update
+
+            try:
+                # Check the (cached) user role before the project is retrieved, no extra XNAT request for it
+                if get_project_roles().get(project_name) == 'Collaborators':
+                    return dbc.Alert("Upload not possible! Your user role in the project '" + project_name + "' does not allow you to upload files.", color="danger"), no_update, no_update, no_update
+                # Resolve the project in the request thread (the background job has no request context)
+                project = get_connection().get_project(project_name)
+
+            except (FailedConnectionException, UnsuccessfulGetException, Exception) as err:
+                return dbc.Alert(str(err), color="danger"), no_update, no_update, no_update
+
+            tags = tags if tags else ''
+            modality = modality if modality else '-'
+
+            # The upload is inserted in the background, the poll interval reports once it is done
+            sweep_spool_dir(UPLOAD_JOBS_DIR, UPLOAD_JOBS_MAX_AGE)
+            job_id = uuid.uuid4().hex
+            submit_job(upload_jobs_executor, get_upload_job_path(job_id), insert_upload, project, filename, dir_name, tags, modality, unpack)
+            return dbc.Alert("Uploading to XNAT... This may take a while for large files, please keep this page open.", color="info"), \
+                {'id': job_id, 'project': project_name, 'started': time.time()}, False, True
 
         else:
-            return dbc.Alert("Please specify Project Name.", color="danger")
+            return dbc.Alert("Please specify Project Name.", color="danger"), no_update, no_update, no_update
 
     else:
-        return no_update
+        return no_update, no_update, no_update, no_update
+
+
+@callback(
+    Output('output-uploader', 'children', allow_duplicate=True),
+    Output('upload_job', 'data', allow_duplicate=True),
+    Output('upload_poll', 'disabled', allow_duplicate=True),
+    Output('click-upload', 'disabled', allow_duplicate=True),
+    Input('upload_poll', 'n_intervals'),
+    State('upload_job', 'data'),
+    prevent_initial_call=True
+)
+def poll_upload_job(n, job):
+    if not job:
+        raise PreventUpdate
+
+    try:
+        job_path = get_upload_job_path(job['id'])
+    except (ValueError, KeyError, TypeError):
+        raise PreventUpdate
+
+    status, message = get_job_status(job_path, job['started'], UPLOAD_JOB_TIMEOUT)
+    if status == 'error':
+        # Allow another attempt with the same file
+        return dbc.Alert(message, color="danger"), None, True, False
+
+    if status == 'running':
+        # Upload is still being inserted
+        raise PreventUpdate
+
+    with open(job_path) as f:
+        dir_name = f.read()
+    os.remove(job_path)
+    project_name = job['project']
+    invalidate_directory_names(project_name)
+    # The directory pages of this worker show the new files right away, other workers once their caches expire
+    invalidate_project_directory_caches(project_name)
+    return dbc.Alert(["The upload was successful! ",
+                      dcc.Link(f"Click here to go to the directory {dir_name.rsplit('::', 1)[-1]}.",
+                               href=f"/dir/{project_name}/{dir_name}",
+                               className="fw-bold text-decoration-none",
+                               style={'color': colors['links']})], color="success"), None, True, True
 
 
 @callback(Output('directory_name', 'options'),Input('project_name','value'), prevent_initial_call=True)
@@ -247,20 +416,7 @@ def layout(project_name: Optional[str] = None):
         return login_required_interface()
 
     return [
-        # Breadcrumbs
-        html.Div(
-        [
-            dcc.Link("Home", href="/", style={"color": colors['sage'], "marginRight": "1%"}),
-            html.Span(" > ", style={"marginRight": "1%"}),
-            html.Span("Upload", className='active fw-bold',style={"color": "#707070"})],
-            className='breadcrumb'),
-
-        html.H1(
-        children='PACS2go - Uploader',
-        style={
-            'textAlign': 'left',
-        },
-        className="mb-3"),
+        *UPLOAD_PAGE_HEADER,
 
         uploader(project_name),
         
@@ -272,5 +428,9 @@ def layout(project_name: Optional[str] = None):
         html.Div(id='keep_alive_output_upload'),
         
         # Store filename for upload to xnat https://dash.plotly.com/sharing-data-between-callbacks
-        dcc.Store(id='filename-storage')
+        dcc.Store(id='filename-storage'),
+
+        # Background upload job and the interval polling for its outcome
+        dcc.Store(id='upload_job'),
+        dcc.Interval(id='upload_poll', interval=1000, disabled=True),
     ]
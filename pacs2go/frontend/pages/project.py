@@ -16,7 +16,9 @@ from pacs2go.data_interface.pacs_data_interface import Project
 from pacs2go.data_interface.pacs_data_interface import Directory
 
 from pacs2go.frontend.helpers import (colors, format_linebreaks,
-                                      get_connection, login_required_interface)
+                                      get_connection,
+                                      invalidate_project_roles,
+                                      login_required_interface)
 
 
 register_page(__name__, title='Project - PACS2go',
@@ -379,6 +381,7 @@ def modal_and_project_deletion(open, close, delete_and_close, is_open, project_n
 
             if project:
                 project.delete_project()
+                invalidate_project_roles()
 
             return is_open, dbc.Alert([f"The project {project.name} has been successfully deleted! ",
                                        dcc.Link(f"Click here to go to back to the projects overview.",
@@ -500,6 +503,7 @@ def modal_add_user_project_callback(open, close, add_and_close, remove_and_close
             project = connection.get_project(project_name)
             if username and level:
                 project.grant_rights_to_user(username, level)
+                invalidate_project_roles()
             
             # Get new version of project details
             project = connection.get_project(project_name)
@@ -514,6 +518,7 @@ def modal_add_user_project_callback(open, close, add_and_close, remove_and_close
             project = connection.get_project(project_name)
             if username:
                 project.revoke_rights_from_user(username)
+                invalidate_project_roles()
             # Get new version of project details
             project = connection.get_project(project_name)
             project_json = json.dumps(project.to_dict())
@@ -9,6 +9,7 @@ from pacs2go.data_interface.exceptions.exceptions import (
     FailedConnectionException, UnsuccessfulAttributeUpdateException,
     UnsuccessfulCreationException, UnsuccessfulGetException)
 from pacs2go.frontend.helpers import (colors, get_connection,
+                                      invalidate_project_roles,
                                       login_required_interface)
 
 register_page(__name__, title='Projects - PACS2go', path='/projects')
@@ -18,12 +19,13 @@ def get_projects_table(projects_json_data: dict, filter: str = ''):
     try:
         rows = []
         projects = json.loads(projects_json_data)
-
+        # Lowercased once for all rows
+        filter = filter.lower()
 
         for p in projects:
             keywords = p['keywords'] if p['keywords'] else "-"
             # Only show rows if no filter is applied of if the filter has a match in the project's keywords
-            if filter.lower() in keywords or filter.lower() in p['name'] or len(filter) == 0:
+            if not filter or filter in keywords or filter in p['name']:
                 # Project names represent links to individual project pages
                 rows.append(html.Tr([html.Td(dcc.Link(p['name'], href=f"/project/{p['name']}", className="fw-bold text-decoration-none", style={'color': colors['links']})), html.Td(
                     p['your_user_role'].capitalize()), html.Td(p['number_of_directories']), html.Td(p['keywords']), html.Td(p['timestamp_creation']), html.Td(p['last_updated'])]))
@@ -129,6 +131,7 @@ def modal_and_project_creation(open, close, create_and_close, is_open, project_n
             # Try to create project
             project = connection.create_project(
                 name=project_name, description=description, keywords=keywords, parameters=parameters)
+            invalidate_project_roles()
             projects = json.dumps([p.to_dict() for p in connection.get_all_projects(only_accessible=True)])
             return is_open, dbc.Alert([html.Span("A new project has been successfully created! "),
                                        html.Span(dcc.Link(f" Click here to go to the new project {project.name}.",
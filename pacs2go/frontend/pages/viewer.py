@@ -1,7 +1,6 @@
 import base64
 import gzip
 import io
-import json
 from tempfile import TemporaryDirectory
 from typing import List, Optional
 
@@ -9,6 +8,7 @@ import dash_bootstrap_components as dbc
 import dash_daq as daq
 import nibabel
 import numpy as np
+import orjson
 import pandas as pd
 import plotly.express as px
 import pydicom
@@ -54,9 +54,8 @@ def show_file(file: File):
 
     elif file.format == 'JSON':
         # Display contents of a JSON file
-        json_str = file.data.decode("utf-8")
-        json_data = json.loads(json_str)
-        content = html.Pre(json.dumps(json_data, indent=2))
+        json_data = orjson.loads(file.data)
+        content = html.Pre(orjson.dumps(json_data, option=orjson.OPT_INDENT_2).decode())
 
     elif file.format == 'CSV':
         # Display CSV as data table
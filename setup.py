@@ -4,6 +4,7 @@ import os
 setup(
     name="pacs2go",
     packages=find_packages(),
+    package_data={"pacs2go.frontend.pages": ["help/*.md"]},
     version=os.getenv('PACS2GO_VERSION'),
     description="exchange medical data with xnat",
     author="Tamara Krafft",